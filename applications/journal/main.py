@@ -20,9 +20,8 @@ from ellipticcurve.privateKey import PrivateKey
 import ellipticcurve.curve as curve
 import os
 import editor
-import usb.core
 import adafruit_usb_host_mass_storage
-import adafruit_usb_host_descriptors
+import usbregistry
 import storage
 
 PROGRAM_FOLDER = "sd/usr/journal"
@@ -349,17 +348,15 @@ def action_stats():
 def action_export():
     print_header("Export to USB Mass Storage")
 
-    msDevice = None
-    while msDevice is None:
-        printf("Searching for mass storage endpoints...")
-        for device in usb.core.find(find_all=True):
-            massStorageEndpoint = adafruit_usb_host_descriptors.find_mass_storage_endpoints(device)[0]
-            if massStorageEndpoint != None:
-                msDevice = device
-            
-        if not msDevice:
-            printf("Couldn't find a storage endpoint... retrying")
-            time.sleep(5)
+    registry = usbregistry.registry
+    entry = registry.find(usbregistry.MASS_STORAGE)
+    if entry is None:
+        printf("Waiting for a USB storage device...")
+        while entry is None:
+            time.sleep(0.25)
+            registry.poll()     # cheap: only new devices are described
+            entry = registry.find(usbregistry.MASS_STORAGE)
+    msDevice = entry.device
 
     printf("Now exporting...")
 
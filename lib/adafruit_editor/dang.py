@@ -38,6 +38,9 @@ COLS = 80
 special_keys = {
     "\x1b": ...,  # all prefixes of special keys must be entered as Ellipsis
     "\x1b[": ...,
+    "\x1b[2": ...,
+    "\x1b[20": ...,
+    "\x1b[200": ...,
     "\x1b[5": ...,
     "\x1b[6": ...,
     "\x1b[A": "KEY_UP",
@@ -49,14 +52,29 @@ special_keys = {
     "\x1b[5~": "KEY_PGUP",
     "\x1b[6~": "KEY_PGDN",
     "\x1b[3~": "KEY_DELETE",
+    "\x1b[200~": "KEY_PASTE",  # bracketed paste; text is left in Screen.paste
 }
 
+_PASTE_END = "\x1b[201~"
+BATCH_BYTES = 4096  # output buffer for Screen.batch()
+
+try:
+    from supervisor import runtime as _runtime
+except ImportError:
+    _runtime = None
+
 
 class Screen:
     def __init__(self):
         self._poll = select.poll()
         self._poll.register(sys.stdin, select.POLLIN)
         self._pending = ""
+        self.paste = ""
+        self._out = None        # batch buffer, allocated on first batch()
+        self._n = 0             # bytes queued in it
+        self._depth = 0         # nesting of batch()
+        self._at = None         # where the terminal cursor is, if known
+        self._move = None       # (start, end) of a move not yet followed by text
 
     def _sys_stdin_readable(self):
         return hasattr(sys.stdin, "readable") and sys.stdin.readable()
@@ -74,15 +92,81 @@ class Screen:
             return r
         return None
 
+    def _read_paste(self):
+        # Read the paste in bulk up to the end marker; anything after it is
+        # left pending for the next getkey().
+        chunks = []
+        tail = ""
+        while True:
+            n = _runtime.serial_bytes_available if _runtime is not None else 0
+            tail += sys.stdin.read(n or 1)
+            k = tail.find(_PASTE_END)
+            if k >= 0:
+                chunks.append(tail[:k])
+                self._pending = tail[k + len(_PASTE_END) :] + self._pending
+                break
+            keep = len(_PASTE_END) - 1
+            if len(tail) > keep:
+                chunks.append(tail[:-keep])
+                tail = tail[-keep:]
+        text = "".join(chunks)
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+
+    def batch(self):
+        """
+        with stdscr.batch(): ... queues everything drawn inside the block and
+        prints it at once on exit. Moves to where the cursor already is are
+        dropped, and so is a move overtaken by another move.
+        """
+        return _Batch(self)
+
+    def flush(self):
+        if self._n:
+            print(end=str(memoryview(self._out)[: self._n], "utf-8"))
+            self._n = 0
+        self._move = None
+
+    def _write(self, text):
+        if not self._depth:
+            print(end=text)
+            return
+        data = text.encode()
+        out = self._out
+        if self._n + len(data) > len(out):
+            self.flush()
+            if len(data) > len(out):
+                print(end=text)
+                return
+        out[self._n : self._n + len(data)] = data
+        self._n += len(data)
+
     def move(self, y, x):
-        print(end=f"\033[{y+1};{x+1}H")
+        if self._depth:
+            if self._at == (y, x):
+                return
+            if self._move is not None and self._move[1] == self._n:
+                self._n = self._move[0]  # nothing drawn there: replace it
+            start = self._n
+            self._write(f"\033[{y+1};{x+1}H")
+            self._move = (start, self._n) if self._n > start else None
+        else:
+            self._write(f"\033[{y+1};{x+1}H")
+        self._at = (y, x)
 
     def erase(self):
-        print(end="\033H\033[2J")
+        self._write("\033H\033[2J")
+        self._at = (0, 0)
+        self._move = None
 
     def addstr(self, y, x, text):
         self.move(y, x)
-        print(end=text)
+        self._write(text)
+        self._move = None
+        end = x + len(text)
+        if end < COLS and "\n" not in text and "\r" not in text and "\033" not in text:
+            self._at = (y, end)
+        else:
+            self._at = None
 
     def getkey(self):
         self._sys_stdout_flush()
@@ -106,18 +190,42 @@ class Screen:
             if code is None:
                 self._pending = c[1:]
                 return c[0]
+            if code == "KEY_PASTE":
+                self.paste = self._read_paste()
             if code is not Ellipsis:
                 return code
 
             pending = c
 
 
+class _Batch:
+    def __init__(self, screen):
+        self._screen = screen
+
+    def __enter__(self):
+        screen = self._screen
+        if screen._out is None:
+            screen._out = bytearray(BATCH_BYTES)
+        if not screen._depth:
+            screen._at = None  # the cursor may have moved since the last frame
+        screen._depth += 1
+        return screen
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        screen = self._screen
+        screen._depth -= 1
+        if not screen._depth:
+            screen.flush()
+
+
 def wrapper(func, *args, **kwds):
     stdscr = Screen()
     try:
         _nonblocking()
+        print(end="\033[?2004h")  # ask the terminal for bracketed paste
         return func(stdscr, *args, **kwds)
     finally:
+        print(end="\033[?2004l")
         _blocking()
         stdscr.move(LINES - 1, 0)
         print("\n")
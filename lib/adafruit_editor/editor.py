@@ -6,6 +6,8 @@
 import gc
 import os
 
+from undolog import UndoLog, INSERT
+
 from . import dang as curses
 
 
@@ -54,15 +56,98 @@ def readonly():
     return storage.getmount("/").readonly
 
 
+PAGE_LINES = 32        # original lines decoded per cache page
+CACHE_PAGES = 8         # pages kept in memory
+CHUNK = 512             # bytes per read while indexing and saving
+
+
 class Buffer:
-    def __init__(self, lines):
-        self.lines = lines
+    """
+    Lines of the file being edited.
+
+    A file is not read into memory: opening it only records where each line
+    starts. `rows` holds, per line, either an int (line number in the
+    original file, still unmodified) or a str (the edited text). Original
+    lines are decoded a page at a time, near where they are viewed, and the
+    last few pages are cached.
+    """
+    def __init__(self, lines=None):
+        self.rows = lines if lines else [""]
+        self.filename = None
+        self._offsets = None        # byte offset of each original line
+        self._size = 0
+        self._newline_at_eof = True
+        self._pages = {}            # page number -> list of str
+        self._lru = []
+
+    @classmethod
+    def open(cls, filename):
+        buffer = cls()
+        buffer._index(filename)
+        return buffer
+
+    def _index(self, filename):
+        import array  # pylint: disable=import-outside-toplevel
+
+        offsets = array.array("L", [0])
+        chunk = bytearray(CHUNK)
+        pos = 0
+        with open(filename, "rb") as f:
+            while True:
+                n = f.readinto(chunk)
+                if not n:
+                    break
+                i = chunk.find(b"\n", 0, n)
+                while i != -1:
+                    offsets.append(pos + i + 1)
+                    i = chunk.find(b"\n", i + 1, n)
+                pos += n
+        self._newline_at_eof = pos != 0 and offsets[-1] == pos
+        if self._newline_at_eof:
+            offsets.pop()           # not the start of another line
+        self.filename = filename
+        self._offsets = offsets
+        self._size = pos
+        self._pages = {}
+        self._lru = []
+        self.rows = list(range(len(offsets))) if pos else [""]
+
+    def _original(self, n):
+        page = n // PAGE_LINES
+        lines = self._pages.get(page)
+        if lines is None:
+            lines = self._load_page(page)
+            self._pages[page] = lines
+            if len(self._lru) >= CACHE_PAGES:
+                self._pages.pop(self._lru.pop(0), None)
+        else:
+            self._lru.remove(page)
+        self._lru.append(page)
+        return lines[n - page * PAGE_LINES]
+
+    def _load_page(self, page):
+        offsets = self._offsets
+        first = page * PAGE_LINES
+        last = min(first + PAGE_LINES, len(offsets))
+        end = offsets[last] if last < len(offsets) else self._size
+        with open(self.filename, "rb") as f:
+            f.seek(offsets[first])
+            data = f.read(end - offsets[first])
+        lines = str(data, "utf-8").split("\n")
+        if self._newline_at_eof or last < len(offsets):
+            lines.pop()             # text after the page's final newline
+        return [line[:-1] if line.endswith("\r") else line for line in lines]
 
     def __len__(self):
-        return len(self.lines)
+        return len(self.rows)
 
     def __getitem__(self, index):
-        return self.lines[index]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.rows)))]
+        line = self.rows[index]
+        if isinstance(line, int):
+            return self._original(line)
+        return line
 
     @property
     def bottom(self):
@@ -70,27 +155,83 @@ class Buffer:
 
     def insert(self, cursor, string):
         row, col = cursor.row, cursor.col
-        current = self.lines.pop(row)
-        new = current[:col] + string + current[col:]
-        self.lines.insert(row, new)
+        current = self[row]
+        self.rows[row] = current[:col] + string + current[col:]
+
+    def paste(self, cursor, text):
+        """Insert multi-line text at the cursor in one splice."""
+        row, col = cursor.row, cursor.col
+        current = self[row]
+        parts = text.split("\n")
+        end_col = len(parts[-1]) + (col if len(parts) == 1 else 0)
+        parts[0] = current[:col] + parts[0]
+        parts[-1] += current[col:]
+        self.rows[row : row + 1] = parts
+        return row + len(parts) - 1, end_col
 
     def split(self, cursor):
         row, col = cursor.row, cursor.col
-        current = self.lines.pop(row)
-        self.lines.insert(row, current[:col])
-        self.lines.insert(row + 1, current[col:])
+        current = self[row]
+        self.rows[row : row + 1] = [current[:col], current[col:]]
 
     def delete(self, cursor):
         row, col = cursor.row, cursor.col
         if (row, col) < (self.bottom, len(self[row])):
-            current = self.lines.pop(row)
+            current = self[row]
             if col < len(current):
-                new = current[:col] + current[col + 1 :]
-                self.lines.insert(row, new)
+                self.rows[row] = current[:col] + current[col + 1 :]
             else:
-                nextline = self.lines.pop(row)
-                new = current + nextline
-                self.lines.insert(row, new)
+                self.rows[row : row + 2] = [current + self[row + 1]]
+
+    def save(self, filename):
+        """
+        Write to filename via a temporary file. Runs of unmodified lines are
+        copied from the original file in CHUNK-sized pieces, never decoded.
+        """
+        tmp = filename + ".tmp"
+        src = open(self.filename, "rb") if self._offsets is not None else None
+        try:
+            with open(tmp, "wb") as out:
+                self._write(out, src)
+        finally:
+            if src is not None:
+                src.close()
+        if os_exists(filename):
+            os.remove(filename)
+        os.rename(tmp, filename)
+        self._index(filename)
+
+    def _write(self, out, src):
+        rows = self.rows
+        offsets = self._offsets
+        n_rows = len(rows)
+        chunk = bytearray(CHUNK)
+        i = 0
+        while i < n_rows:
+            line = rows[i]
+            last = i == n_rows - 1
+            if not isinstance(line, int):
+                out.write(line.encode())
+                if not last or self._newline_at_eof:
+                    out.write(b"\n")
+                i += 1
+                continue
+            # A run of consecutive original lines: copy its bytes as-is
+            j = i
+            while j + 1 < n_rows and isinstance(rows[j + 1], int) and rows[j + 1] == rows[j] + 1:
+                j += 1
+            end_line = rows[j] + 1
+            start = offsets[line]
+            end = offsets[end_line] if end_line < len(offsets) else self._size
+            src.seek(start)
+            mv = memoryview(chunk)
+            while start < end:
+                n = src.readinto(mv[: min(CHUNK, end - start)])
+                out.write(mv[:n])
+                start += n
+            if end_line == len(offsets) and not self._newline_at_eof and j < n_rows - 1:
+                out.write(b"\n")   # the file's unterminated last line is no longer last
+            i = j + 1
 
 
 def clamp(x, lower, upper):
@@ -198,13 +339,30 @@ def end(window, buffer, cursor):
 
 def editor(stdscr, filename):  # pylint: disable=too-many-branches,too-many-statements
     if os_exists(filename):
-        with open(filename, "r", encoding="utf-8") as f:
-            buffer = Buffer(f.read().splitlines())
+        buffer = Buffer.open(filename)
     else:
         buffer = Buffer([""])
 
     window = Window(curses.LINES - 1, curses.COLS - 1)
     cursor = Cursor()
+    undo = UndoLog()
+
+    def char_at(cursor):
+        line = buffer[cursor.row]
+        return line[cursor.col] if cursor.col < len(line) else "\n"
+
+    def apply(op, reverse):
+        kind, row, col, text = op
+        at = Cursor(row, col)
+        if (kind == INSERT) == reverse:
+            for _ in text:
+                buffer.delete(at)
+            cursor.row, cursor.col = row, col
+        else:
+            cursor.row, cursor.col = buffer.paste(at, text)
+        if not window.row <= cursor.row <= window.bottom:
+            window.row = max(0, cursor.row - window.n_rows // 2)
+        window.horizontal_scroll(cursor)
 
     stdscr.erase()
 
@@ -218,35 +376,45 @@ def editor(stdscr, filename):  # pylint: disable=too-many-branches,too-many-stat
         stdscr.addstr(row, 0, line)
 
     while True:
-        lastrow = 0
-        for row, line in enumerate(buffer[window.row : window.row + window.n_rows]):
-            lastrow = row
-            if row == cursor.row - window.row and window.col > 0:
-                line = "«" + line[window.col + 1 :]
-            if len(line) > window.n_cols:
-                line = line[: window.n_cols - 1] + "»"
+        with stdscr.batch():  # one write per frame
+            lastrow = 0
+            for row, line in enumerate(buffer[window.row : window.row + window.n_rows]):
+                lastrow = row
+                if row == cursor.row - window.row and window.col > 0:
+                    line = "«" + line[window.col + 1 :]
+                if len(line) > window.n_cols:
+                    line = line[: window.n_cols - 1] + "»"
+                setline(row, line)
+            for row in range(lastrow + 1, window.n_rows):
+                setline(row, "~~ EOF ~~")
+            row = curses.LINES - 1
+            if readonly():
+                line = f"{filename:12} (readonly) | ^C: quit{gc_mem_free_hint()}"
+            else:
+                line = f"{filename:12} | ^X: write & exit | ^C: quit w/o save{gc_mem_free_hint()}"
             setline(row, line)
-        for row in range(lastrow + 1, window.n_rows):
-            setline(row, "~~ EOF ~~")
-        row = curses.LINES - 1
-        if readonly():
-            line = f"{filename:12} (readonly) | ^C: quit{gc_mem_free_hint()}"
-        else:
-            line = f"{filename:12} | ^X: write & exit | ^C: quit w/o save{gc_mem_free_hint()}"
-        setline(row, line)
 
-        stdscr.move(*window.translate(cursor))
+            stdscr.move(*window.translate(cursor))
 
         k = stdscr.getkey()
+        if k in ("KEY_HOME", "KEY_END", "KEY_LEFT", "KEY_RIGHT", "KEY_UP", "KEY_DOWN", "KEY_PGUP", "KEY_PGDN"):
+            undo.seal()  # moving the cursor ends the current undo step
         if len(k) == 1 and " " <= k <= "~":
+            undo.insert(cursor.row, cursor.col, k)
             buffer.insert(cursor, k)
             for _ in k:
                 right(window, buffer, cursor)
-        elif k == "\x18" and not readonly:  # ctrl-x
-            with open(filename, "w", encoding="utf-8") as f:
-                for row in buffer:
-                    f.write(row)
+        elif k == "\x18" and not readonly():  # ctrl-x
+            buffer.save(filename)
             return
+        elif k == "\x1a":  # ctrl-z
+            op = undo.undo()
+            if op is not None:
+                apply(op, True)
+        elif k == "\x19":  # ctrl-y
+            op = undo.redo()
+            if op is not None:
+                apply(op, False)
         elif k == "KEY_HOME":
             home(window, buffer, cursor)
         elif k == "KEY_END":
@@ -273,14 +441,24 @@ def editor(stdscr, filename):  # pylint: disable=too-many-branches,too-many-stat
                 window.horizontal_scroll(cursor)
         elif k == "KEY_RIGHT":
             right(window, buffer, cursor)
+        elif k == "KEY_PASTE":
+            undo.insert(cursor.row, cursor.col, stdscr.paste)
+            cursor.row, cursor.col = buffer.paste(cursor, stdscr.paste)
+            if cursor.row > window.bottom:
+                window.row = cursor.row - window.n_rows + 1
+            window.horizontal_scroll(cursor)
         elif k == "\n":
+            undo.insert(cursor.row, cursor.col, "\n")
             buffer.split(cursor)
             right(window, buffer, cursor)
         elif k in ("KEY_DELETE", "\x04"):
+            if (cursor.row, cursor.col) < (buffer.bottom, len(buffer[cursor.row])):
+                undo.delete(cursor.row, cursor.col, char_at(cursor))
             buffer.delete(cursor)
         elif k in ("KEY_BACKSPACE", "\x7f"):
             if (cursor.row, cursor.col) > (0, 0):
                 left(window, buffer, cursor)
+                undo.delete(cursor.row, cursor.col, char_at(cursor))
                 buffer.delete(cursor)
 
 
@@ -30,22 +30,24 @@ def has_good_extension(filename):
 
 
 def picker(stdscr, options, notes=(), start_idx=0):
-    stdscr.erase()
-    stdscr.addstr(curses.LINES - 1, 0, "Enter: select | ^C: quit")
     del options[curses.LINES - 1 :]
-    for row, option in enumerate(options):
-        if row < len(notes) and (note := notes[row]):
-            option = f"{option} {note}"
+    with stdscr.batch():
+        stdscr.erase()
+        stdscr.addstr(curses.LINES - 1, 0, "Enter: select | ^C: quit")
+        for row, option in enumerate(options):
+            if row < len(notes) and (note := notes[row]):
+                option = f"{option} {note}"
 
-        stdscr.addstr(row, 3, option)
+            stdscr.addstr(row, 3, option)
 
     old_idx = None
     idx = start_idx
     while True:
         if idx != old_idx:
-            if old_idx is not None:
-                stdscr.addstr(old_idx, 0, "  ")
-            stdscr.addstr(idx, 0, "=>")
+            with stdscr.batch():
+                if old_idx is not None:
+                    stdscr.addstr(old_idx, 0, "  ")
+                stdscr.addstr(idx, 0, "=>")
             old_idx = idx
 
         k = stdscr.getkey()
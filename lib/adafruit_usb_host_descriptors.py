@@ -83,100 +83,107 @@ def get_configuration_descriptor(device, index):
     return full_buf
 
 
-def _find_boot_endpoint(device, protocol_type: Literal[PROTOCOL_MOUSE, PROTOCOL_KEYBOARD]):
-    config_descriptor = get_configuration_descriptor(device, 0)
+# Reused by parse_configuration(); grown if a device's configuration is larger
+_config_head = bytearray(4)
+_config_buf = bytearray(256)
+
+
+def parse_configuration(device, index=0):
+    """
+    Fetch configuration descriptor `index` once into a shared buffer and
+    summarize it.
+
+    :param device: The device to describe
+    :return: a list of (interface_number, class, subclass, protocol, endpoints)
+        tuples, where endpoints is a list of
+        (endpoint_address, attributes, max_packet_size) tuples
+    """
+    global _config_buf  # pylint: disable=global-statement
+    get_descriptor(device, DESC_CONFIGURATION, index, _config_head)
+    total = _config_head[2] | _config_head[3] << 8
+    if total > len(_config_buf):
+        _config_buf = bytearray(total)
+    view = memoryview(_config_buf)[:total]
+    get_descriptor(device, DESC_CONFIGURATION, index, view)
+
+    interfaces = []
+    endpoints = None
     i = 0
-    mouse_interface_index = None
-    found_mouse = False
-    while i < len(config_descriptor):
-        descriptor_len = config_descriptor[i]
-        descriptor_type = config_descriptor[i + 1]
+    while i + 1 < total:
+        length = view[i]
+        if length < 2:
+            break  # malformed; don't spin
+        descriptor_type = view[i + 1]
         if descriptor_type == DESC_INTERFACE:
-            interface_number = config_descriptor[i + 2]
-            interface_class = config_descriptor[i + 5]
-            interface_subclass = config_descriptor[i + 6]
-            interface_protocol = config_descriptor[i + 7]
-            if (
-                interface_class == INTERFACE_HID
-                and interface_subclass == SUBCLASS_BOOT
-                and interface_protocol == protocol_type
-            ):
-                found_mouse = True
-                mouse_interface_index = interface_number
-
-        elif descriptor_type == DESC_ENDPOINT:
-            endpoint_address = config_descriptor[i + 2]
+            endpoints = []
+            interfaces.append((view[i + 2], view[i + 5], view[i + 6], view[i + 7], endpoints))
+        elif descriptor_type == DESC_ENDPOINT and endpoints is not None:
+            endpoints.append((view[i + 2], view[i + 3], view[i + 4] | view[i + 5] << 8))
+        i += length
+    return interfaces
+
+
+def find_interface(interfaces, interface_class, subclass, protocol):
+    """Return the first parsed interface matching class/subclass/protocol, or None."""
+    for interface in interfaces:
+        if interface[1:4] == (interface_class, subclass, protocol):
+            return interface
+    return None
+
+
+def _find_boot_endpoint(device, protocol_type: Literal[PROTOCOL_MOUSE, PROTOCOL_KEYBOARD], interfaces=None):
+    if interfaces is None:
+        interfaces = parse_configuration(device)
+    interface = find_interface(interfaces, INTERFACE_HID, SUBCLASS_BOOT, protocol_type)
+    if interface is not None:
+        for endpoint_address, _, _ in interface[4]:
             if endpoint_address & _DIR_IN:
-                if found_mouse:
-                    return mouse_interface_index, endpoint_address
-        i += descriptor_len
+                return interface[0], endpoint_address
     return None, None
 
 
-def find_boot_mouse_endpoint(device):
+def find_boot_mouse_endpoint(device, interfaces=None):
     """
     Try to find a boot mouse endpoint in the device and return its
     interface index, and endpoint address.
     :param device: The device to search within
+    :param interfaces: The result of parse_configuration(device), if already fetched
     :return: mouse_interface_index, mouse_endpoint_address if found, or None, None otherwise
     """
-    return _find_boot_endpoint(device, PROTOCOL_MOUSE)
+    return _find_boot_endpoint(device, PROTOCOL_MOUSE, interfaces)
 
 
-def find_boot_keyboard_endpoint(device):
+def find_boot_keyboard_endpoint(device, interfaces=None):
     """
     Try to find a boot keyboard endpoint in the device and return its
     interface index, and endpoint address.
     :param device: The device to search within
+    :param interfaces: The result of parse_configuration(device), if already fetched
     :return: keyboard_interface_index, keyboard_endpoint_address if found, or None, None otherwise
     """
-    return _find_boot_endpoint(device, PROTOCOL_KEYBOARD)
+    return _find_boot_endpoint(device, PROTOCOL_KEYBOARD, interfaces)
 
 INTERFACE_MASS_STORAGE = 0x08
 SUBCLASS_SCSI = 0x06
 PROTOCOL_BULK_ONLY = 0x50
 
-def find_mass_storage_endpoints(device):
-    config = get_configuration_descriptor(device, 0)
-    i = 0
-    ms_interface_index = None
+def find_mass_storage_endpoints(device, interfaces=None):
+    if interfaces is None:
+        interfaces = parse_configuration(device)
+    interface = find_interface(interfaces, INTERFACE_MASS_STORAGE, SUBCLASS_SCSI, PROTOCOL_BULK_ONLY)
+    if interface is None:
+        return None, None, None
     bulk_in = None
     bulk_out = None
-
-    while i < len(config):
-        length = config[i]
-        dtype = config[i+1]
-
-        # Interface descriptor?
-        if dtype == DESC_INTERFACE:
-            interface_number = config[i+2]
-            interface_class = config[i+5]
-            interface_subclass = config[i+6]
-            interface_protocol = config[i+7]
-
-            if (
-                interface_class == INTERFACE_MASS_STORAGE
-                and interface_subclass == SUBCLASS_SCSI
-                and interface_protocol == PROTOCOL_BULK_ONLY
-            ):
-                ms_interface_index = interface_number
-
-        # Endpoint descriptor?
-        elif dtype == DESC_ENDPOINT and ms_interface_index is not None:
-            endpoint_address = config[i+2]
-            attributes = config[i+3]
-
-            # Only care about bulk endpoints
-            if (attributes & 0x03) == 0x02:  # bmAttributes bits 0-1 == 0b10 → BULK
-                if endpoint_address & 0x80:
-                    bulk_in = endpoint_address
-                else:
-                    bulk_out = endpoint_address
-
-                # If both found, we're done
-                if bulk_in and bulk_out:
-                    return ms_interface_index, bulk_in, bulk_out
-
-        i += length
-
+    for endpoint_address, attributes, _ in interface[4]:
+        # Only care about bulk endpoints
+        if (attributes & 0x03) == 0x02:  # bmAttributes bits 0-1 == 0b10 → BULK
+            if endpoint_address & 0x80:
+                bulk_in = endpoint_address
+            else:
+                bulk_out = endpoint_address
+
+            # If both found, we're done
+            if bulk_in and bulk_out:
+                return interface[0], bulk_in, bulk_out
     return None, None, None
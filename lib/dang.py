@@ -40,29 +40,231 @@ LINES = 33
 COLS = 120
 
 special_keys = {
-    "\x1b": ...,  # all prefixes of special keys must be entered as Ellipsis
-    "\x1b[": ...,
-    "\x1b[3": ...,
-    "\x1b[5": ...,
-    "\x1b[6": ...,
     "\x1b[A": "KEY_UP",
     "\x1b[B": "KEY_DOWN",
     "\x1b[C": "KEY_RIGHT",
     "\x1b[D": "KEY_LEFT",
+    "\x1bOA": "KEY_UP",
+    "\x1bOB": "KEY_DOWN",
+    "\x1bOC": "KEY_RIGHT",
+    "\x1bOD": "KEY_LEFT",
+    "\x1b[1;5A": "KEY_CTRL_UP",
+    "\x1b[1;5B": "KEY_CTRL_DOWN",
+    "\x1b[1;5C": "KEY_CTRL_RIGHT",
+    "\x1b[1;5D": "KEY_CTRL_LEFT",
     "\x1b[H": "KEY_HOME",
     "\x1b[F": "KEY_END",
+    "\x1bOH": "KEY_HOME",
+    "\x1bOF": "KEY_END",
+    "\x1b[1~": "KEY_HOME",
+    "\x1b[4~": "KEY_END",
+    "\x1b[2~": "KEY_INSERT",
+    "\x1b[3~": "KEY_DELETE",
     "\x1b[5~": "KEY_PGUP",
     "\x1b[6~": "KEY_PGDN",
-    "\x1b[3~": "KEY_DELETE",
-}
+    "\x1b[Z": "KEY_BTAB",
+    "\x1bOP": "KEY_F1",
+    "\x1bOQ": "KEY_F2",
+    "\x1bOR": "KEY_F3",
+    "\x1bOS": "KEY_F4",
+    "\x1b[1;3P": "KEY_F1",        # Alt/Ctrl+F1..F4 (console switching)
+    "\x1b[1;3Q": "KEY_F2",
+    "\x1b[1;3R": "KEY_F3",
+    "\x1b[1;3S": "KEY_F4",
+    "\x1b[1;5P": "KEY_F1",
+    "\x1b[1;5Q": "KEY_F2",
+    "\x1b[1;5R": "KEY_F3",
+    "\x1b[1;5S": "KEY_F4",
+    "\x1b[15~": "KEY_F5",
+    "\x1b[17~": "KEY_F6",
+    "\x1b[18~": "KEY_F7",
+    "\x1b[19~": "KEY_F8",
+    "\x1b[20~": "KEY_F9",
+    "\x1b[21~": "KEY_F10",
+    "\x1b[23~": "KEY_F11",
+    "\x1b[24~": "KEY_F12",
+    "\x1b[200~": "KEY_PASTE",      # bracketed paste start; the end marker is
+}                                   # consumed by KeyDecoder itself
+
+_PASTE_END = "\x1b[201~"
+ESC_TIMEOUT_MS = 50
+PASTE_BURST = 16    # plain chars in one read that the editors take as a paste
+BATCH_BYTES = 4096  # output buffer for Screen.batch()
+
+try:
+    from supervisor import runtime as _runtime, ticks_ms
+except ImportError:
+    _runtime = None
+    from time import monotonic as _monotonic
+
+    def ticks_ms():
+        return int(_monotonic() * 1000) & 0x1FFFFFFF
+
+
+def _ticks_diff(a, b):
+    return (a - b) & 0x1FFFFFFF
+
+
+def read_serial():
+    """
+    Everything already received on the serial console. The runtime counts
+    bytes but stdin.read(n) counts characters, and would block for more
+    input after a multi-byte UTF-8 character, so read one at a time while
+    bytes remain.
+    """
+    chars = []
+    while _runtime.serial_bytes_available:
+        chars.append(sys.stdin.read(1))
+    return "".join(chars)
+
+
+def _build_trie(table):
+    """Nested dicts keyed by character code; leaves are the key names."""
+    root = {}
+    for seq, name in table.items():
+        node = root
+        for ch in seq[:-1]:
+            node = node.setdefault(ord(ch), {})
+        node[ord(seq[-1])] = name
+    return root
+
+
+class KeyDecoder:
+    """
+    State machine turning raw terminal input into keys. feed() takes
+    whatever has been read in bulk; decoded keys queue up in `keys`.
+    A lone ESC is released once ESC_TIMEOUT_MS passes with nothing after it.
+    Bracketed pastes come out as one "KEY_PASTE" key with the text in
+    `pastes`; so does a run of `burst` plain characters in one read, when
+    burst is set (the editors' wrappers do, the shell does not).
+    """
+
+    def __init__(self, table=special_keys, burst=0):
+        self._root = _build_trie(table)
+        self._node = self._root
+        self._seq = ""          # bytes of the partial escape sequence
+        self._since = 0
+        self._paste = None      # chunks while inside a bracketed paste
+        self._tail = ""         # last few pasted chars, to spot a split end marker
+        self.keys = []
+        self.pastes = []
+        self.burst = burst
+
+    @property
+    def pending(self):
+        return self._node is not self._root
+
+    def feed(self, data, now=None):
+        if now is None:
+            now = ticks_ms()
+        i = 0
+        n = len(data)
+        while i < n:
+            if self._paste is not None:
+                i = self._feed_paste(data, i)
+                continue
+            ch = data[i]
+            c = ord(ch)
+            node = self._node
+            if node is self._root and c != 27:
+                i = self._feed_plain(data, i)
+                continue
+            i += 1
+            nxt = node.get(c)
+            if nxt is None:
+                # Not a sequence we know: release what we held as plain keys.
+                self._flush()
+                if c == 27:
+                    self._node = self._root[27]
+                    self._seq = ch
+                    self._since = now
+                else:
+                    self.keys.append(ch)
+            elif isinstance(nxt, str):
+                self._node = self._root
+                self._seq = ""
+                if nxt == "KEY_PASTE":
+                    self._paste = []
+                    self._tail = ""
+                else:
+                    self.keys.append(nxt)
+            else:
+                self._node = nxt
+                self._seq += ch
+                self._since = now
+
+    def _feed_plain(self, data, i):
+        # A run of text longer than anyone types between two reads is a paste
+        # from a terminal without bracketed paste: hand it over in one piece.
+        if not self.burst:
+            self.keys.append(data[i])
+            return i + 1
+        j = i
+        n = len(data)
+        while j < n and (data[j] >= " " or data[j] in "\r\n\t") and data[j] != "\x7f":
+            j += 1
+        if j - i >= self.burst:
+            text = data[i:j]
+            self.pastes.append(text.replace("\r\n", "\n").replace("\r", "\n"))
+            self.keys.append("KEY_PASTE")
+            return j
+        self.keys.append(data[i])
+        return i + 1
+
+    def _feed_paste(self, data, i):
+        chunk = data[i:]
+        carry = self._tail + chunk
+        k = carry.find(_PASTE_END)
+        if k < 0:
+            self._paste.append(chunk)
+            self._tail = carry[-(len(_PASTE_END) - 1):]
+            return len(data)
+        cut = k - len(self._tail)
+        if cut < 0:
+            # The end marker started in earlier chunks: trim it off them.
+            trim = -cut
+            while trim:
+                last = self._paste.pop()
+                if len(last) > trim:
+                    self._paste.append(last[:-trim])
+                    break
+                trim -= len(last)
+        else:
+            self._paste.append(chunk[:cut])
+        text = "".join(self._paste)
+        self._paste = None
+        self.pastes.append(text.replace("\r\n", "\n").replace("\r", "\n"))
+        self.keys.append("KEY_PASTE")
+        return i + cut + len(_PASTE_END)
+
+    def _flush(self):
+        for ch in self._seq:
+            self.keys.append(ch)
+        self._node = self._root
+        self._seq = ""
+
+    def expire(self, now=None):
+        """Release a held lone ESC (or stray prefix) once it has gone stale."""
+        if self._node is self._root:
+            return
+        if now is None:
+            now = ticks_ms()
+        if _ticks_diff(now, self._since) >= ESC_TIMEOUT_MS:
+            self._flush()
 
 
 class Screen:
     def __init__(self, terminal=None):
         self._poll = select.poll()
         self._poll.register(sys.stdin, select.POLLIN)
-        self._pending = ""
+        self._decoder = KeyDecoder()
         self._terminal = terminal
+        self.paste = ""
+        self._out = None        # batch buffer, allocated on first batch()
+        self._n = 0             # bytes queued in it
+        self._depth = 0         # nesting of batch()
+        self._at = None         # where the terminal cursor is, if known
+        self._move = None       # (start, end) of a move not yet followed by text
 
     def _sys_stdin_readable(self):
         return hasattr(sys.stdin, "readable") and sys.stdin.readable()
@@ -80,61 +282,153 @@ class Screen:
             return r
         return None
 
-    def move(self, y, x):
+    def _read_available(self, timeout):
+        """Read everything already buffered, waiting up to timeout ms for it."""
+        if _runtime is None:
+            return self._terminal_read_timeout(timeout)
+        if not _runtime.serial_bytes_available and not self._poll.poll(timeout):
+            return None
+        return read_serial() or None
+
+    def batch(self):
+        """
+        with stdscr.batch(): ... queues everything drawn inside the block and
+        sends it as one write on exit. Moves to where the cursor already is
+        are dropped, and so is a move overtaken by another move.
+        """
+        return _Batch(self)
+
+    def _emit(self, data):
         if self._terminal is not None:
-            self._terminal.write(f"\033[{y+1};{x+1}H")
+            self._terminal.write(data)
         else:
-            print(end=f"\033[{y+1};{x+1}H")
+            print(end=str(data, "utf-8"))
 
-    def erase(self):
-        if self._terminal is not None:
-            self._terminal.write("\033H\033[2J")
+    def flush(self):
+        if self._n:
+            self._emit(memoryview(self._out)[:self._n])
+            self._n = 0
+        self._move = None
+
+    def _write(self, text):
+        if not self._depth:
+            if self._terminal is not None:
+                self._terminal.write(text)
+            else:
+                print(end=text)
+            return
+        data = text.encode()
+        out = self._out
+        if self._n + len(data) > len(out):
+            self.flush()
+            if len(data) > len(out):
+                self._emit(data)
+                return
+        out[self._n:self._n + len(data)] = data
+        self._n += len(data)
+
+    def move(self, y, x):
+        if self._depth:
+            if self._at == (y, x):
+                return
+            if self._move is not None and self._move[1] == self._n:
+                self._n = self._move[0]     # nothing drawn there: replace it
+            start = self._n
+            self._write(f"\033[{y+1};{x+1}H")
+            self._move = (start, self._n) if self._n > start else None
         else:
-            print(end="\033H\033[2J")
+            self._write(f"\033[{y+1};{x+1}H")
+        self._at = (y, x)
+
+    def erase(self):
+        self._write("\033H\033[2J")
+        self._at = (0, 0)
+        self._move = None
 
     def addstr(self, y, x, text):
         self.move(y, x)
-        if self._terminal is not None:
-            self._terminal.write(text)
+        self._write(text)
+        self._move = None
+        end = x + len(text)
+        if end < COLS and "\n" not in text and "\r" not in text and "\033" not in text:
+            self._at = (y, end)
         else:
-            print(end=text)
+            self._at = None
 
     def getkey(self):
+        """Next decoded key, or None if nothing arrives within 50 ms."""
         self._sys_stdout_flush()
-        pending = self._pending
-        if pending and (code := special_keys.get(pending)) is None:
-            self._pending = pending[1:]
-            return pending[0]
-
-        while True:
-            if pending:
-                c = self._terminal_read_timeout(50)
-                if c is None:
-                    self._pending = pending[1:]
-                    return pending[0]
+        if _runtime is not None:
+            # On the device every input source feeds the shared event bus.
+            import inputbus  # pylint: disable=import-outside-toplevel
+
+            bus = inputbus.bus
+            if not bus.count:
+                bus.wait(ESC_TIMEOUT_MS)
+            k = bus.get_key()
+            if k == "KEY_PASTE":
+                self.paste = bus.paste
+            return k
+        dec = self._decoder
+        if not dec.keys:
+            data = self._read_available(ESC_TIMEOUT_MS)
+            if data:
+                dec.feed(data)
             else:
-                c = self._terminal_read_timeout(50)
-                if c is None:
-                    return None
-            c = pending + c
+                dec.expire()
+        if not dec.keys:
+            return None
+        k = dec.keys.pop(0)
+        if k == "KEY_PASTE":
+            self.paste = dec.pastes.pop(0)
+        return k
+
+
+class _Batch:
+    def __init__(self, screen):
+        self._screen = screen
+
+    def __enter__(self):
+        screen = self._screen
+        if screen._out is None:
+            screen._out = bytearray(BATCH_BYTES)
+        if not screen._depth:
+            screen._at = None   # the cursor may have moved since the last frame
+        screen._depth += 1
+        return screen
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        screen = self._screen
+        screen._depth -= 1
+        if not screen._depth:
+            screen.flush()
+
+
+def _bracketed_paste(on):
+    # Ask the host terminal to mark pastes with ESC[200~ ... ESC[201~
+    print(end="\033[?2004h" if on else "\033[?2004l")
 
-            code = special_keys.get(c)
 
-            if code is None:
-                self._pending = c[1:]
-                return c[0]
-            if code is not Ellipsis:
-                return code
+def _paste_bursts(stdscr, on):
+    # Only the editors take a fast run of plain text as a paste
+    burst = PASTE_BURST if on else 0
+    stdscr._decoder.burst = burst
+    if _runtime is not None:
+        import inputbus  # pylint: disable=import-outside-toplevel
 
-            pending = c
+        inputbus.set_paste_burst(burst)
 
 
 def wrapper(func, *args, **kwds):
     stdscr = Screen()
     try:
         _nonblocking()
+        _bracketed_paste(True)
+        _paste_bursts(stdscr, True)
         return func(stdscr, *args, **kwds)
     finally:
+        _paste_bursts(stdscr, False)
+        _bracketed_paste(False)
         _blocking()
         stdscr.move(LINES - 1, 0)
         print("\n")
@@ -143,8 +437,12 @@ def custom_terminal_wrapper(terminal, func, *args, **kwds):
     stdscr = Screen(terminal)
     try:
         _nonblocking()
+        _bracketed_paste(True)
+        _paste_bursts(stdscr, True)
         return func(stdscr, *args, **kwds)
     finally:
+        _paste_bursts(stdscr, False)
+        _bracketed_paste(False)
         _blocking()
         stdscr.move(LINES - 1, 0)
         print("\n")
\ No newline at end of file
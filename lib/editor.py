@@ -1,9 +1,24 @@
+import os
+import re
+import time
 import displayio
 from terminalio import FONT, Terminal
 import helpers
 from tilepalettemapper import TilePaletteMapper
 from helpers import MAX_CHARS_WIDTH, MAX_LINES
 import dang as curses
+from gapbuffer import GapBuffer
+from undolog import UndoLog, INSERT
+from pysyntax import Highlighter
+
+# [background, foreground] palette indices for each pysyntax token class
+COLORS = ([0, 1], [0, 3], [0, 4], [0, 5], [0, 6])
+
+SECTOR = 512            # bytes per write when saving
+AUTOSAVE_S = 30         # seconds between swap file snapshots
+BUFFER_BUDGET = 32768   # bytes of inactive documents kept in RAM
+SPILL_DIR = "sd/tmp"    # where inactive documents go past the budget
+OUTPUT_ROWS = 8         # height of the ^R output pane, separator included
 
 class Window:
     def __init__(self, n_rows, n_cols, row=0, col=0):
@@ -20,8 +35,8 @@ class Window:
         if cursor.row == self.row - 1 and self.row > 0:
             self.row -= 1
 
-    def down(self, buffer, cursor):
-        if cursor.row == self.bottom + 1 and self.bottom < len(buffer) - 1:
+    def down(self, n_lines, cursor):
+        if cursor.row == self.bottom + 1 and self.bottom < n_lines - 1:
             self.row += 1
 
     def horizontal_scroll(self, cursor, left_margin=5, right_margin=2):
@@ -32,113 +47,801 @@ class Window:
         return cursor.row - self.row, cursor.col - self.col
 
 
-def editor(stdscr, terminal_tilegrid, on_save=""):
+class Search:
+    """
+    Incremental search state. Per-row match lists are cached and computed
+    lazily (visible rows for highlighting, then row by row for find), so a
+    keystroke only scans rows it has not seen for this query. While a
+    plain query is extended, rows that missed the shorter query are known
+    to miss the longer one too and are skipped.
+    """
+    def __init__(self):
+        self.query = ""
+        self.ignore_case = True
+        self.regex = False
+        self.active = False     # highlight matches on screen
+        self._re = None
+        self._hits = {}         # row -> [(start, end), ...]
+        self._misses = set()    # rows without a match
+        self._stack = []        # (query, hits, misses) before each typed char
+
+    def status(self):
+        mode = "re" if self.regex else ("aa" if self.ignore_case else "Aa")
+        return f"Find [{mode}]: {self.query}   ^N/^P next/prev ^T case ^E regex"
+
+    def _reset(self):
+        self._hits = {}
+        self._misses = set()
+        self._stack = []
+        self._re = None
+        if self.regex and self.query:
+            try:
+                self._re = re.compile(self.query)
+            except Exception:   # incomplete pattern while typing: no matches
+                self._re = None
+
+    def set_query(self, query):
+        old = self.query
+        self.query = query
+        if not self.regex and query[:-1] == old and old:
+            # narrowing: only rows that matched `old` can match `query`
+            self._stack.append((old, self._hits, self._misses))
+            self._hits = {}
+            self._misses = set(self._misses)
+        elif not self.regex and self._stack and self._stack[-1][0] == query:
+            _, self._hits, self._misses = self._stack.pop()
+        else:
+            self._reset()
+
+    def toggle(self, ignore_case=None, regex=None):
+        if ignore_case is not None:
+            self.ignore_case = ignore_case
+        if regex is not None:
+            self.regex = regex
+        self._reset()
+
+    def forget(self, rows=(), below=None):
+        """Drop cached results for edited rows (and every row from `below`)."""
+        self._stack = []
+        for cache in (self._hits, self._misses):
+            for row in list(cache):
+                if row in rows or (below is not None and row >= below):
+                    if isinstance(cache, dict):
+                        del cache[row]
+                    else:
+                        cache.discard(row)
+
+    def matches(self, buf, row):
+        if not self.query or row in self._misses:
+            return ()
+        hits = self._hits.get(row)
+        if hits is None:
+            hits = self._scan(buf.line(row))
+            if hits:
+                self._hits[row] = hits
+            else:
+                self._misses.add(row)
+        return hits
+
+    def _scan(self, line):
+        hits = []
+        if self.regex:
+            # MicroPython's re has no IGNORECASE or finditer: search slices
+            if self._re is None:
+                return hits
+            pos = 0
+            while pos <= len(line):
+                m = self._re.search(line[pos:])
+                if m is None:
+                    break
+                start, end = pos + m.start(0), pos + m.end(0)
+                hits.append((start, end))
+                pos = end if end > start else start + 1
+            return hits
+        query = self.query
+        if self.ignore_case:
+            line = line.lower()
+            query = query.lower()
+        i = line.find(query)
+        while i != -1:
+            hits.append((i, i + len(query)))
+            i = line.find(query, i + len(query))
+        return hits
+
+    def find(self, buf, row, col, direction):
+        """
+        Next match from (row, col), wrapping around: direction 1 is strictly
+        after, -1 strictly before, 0 at or after. Returns (row, col) or None.
+        """
+        n = buf.line_count()
+        for step in range(n + 1):
+            r = (row + (step if direction >= 0 else -step)) % n
+            hits = self.matches(buf, r)
+            if not hits:
+                continue
+            if step == 0:
+                if direction > 0:
+                    hits = [h for h in hits if h[0] > col]
+                elif direction < 0:
+                    hits = [h for h in hits if h[0] < col]
+                else:
+                    hits = [h for h in hits if h[0] >= col]
+            elif step == n:
+                # wrapped back to the start row: the part skipped at step 0
+                if direction >= 0:
+                    hits = [h for h in hits if h[0] < col]
+                else:
+                    hits = [h for h in hits if h[0] > col]
+            if hits:
+                return r, hits[0][0] if direction >= 0 else hits[-1][0]
+        return None
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def save_buffer(buf, path):
+    """
+    Write buf to path through a temporary file, one SECTOR-sized write at a
+    time, then rename it over path. The text is copied straight out of the
+    gap buffer; no second copy of the document is built.
+    """
+    tmp = path + ".tmp"
+    out = bytearray(SECTOR)
+    n = 0
+    with open(tmp, "wb") as f:
+        for chunk in buf.chunks():
+            i = 0
+            while i < len(chunk):
+                take = min(SECTOR - n, len(chunk) - i)
+                out[n:n + take] = chunk[i:i + take]
+                n += take
+                i += take
+                if n == SECTOR:
+                    f.write(out)
+                    n = 0
+        if n:
+            f.write(memoryview(out)[:n])
+    _remove(path)
+    os.rename(tmp, path)
+
+
+class Swap:
+    """
+    Crash journal for a file being edited, kept in path + ".swp". It starts
+    with the size and mtime of the file it was taken against; each
+    snapshot appends the line count and the lines changed since the last
+    one, and replaying them over that same file gives back the buffer. Only
+    used for documents with a path, so text the caller keeps off disk (the
+    journal encrypts its entries) never reaches a swap file.
+    """
+    def __init__(self, path):
+        self.base = path
+        self.path = path + ".swp"
+        self.stale = None       # where a swap for another version was moved
+        self.stamp = self._stamp()  # the file as loaded (or last saved)
+        self.rows = set()       # rows changed since the last snapshot
+        self.below = None       # ... and every row from here down
+        self.last = time.monotonic()
+        self.enabled = True
+
+    def touch(self, rows=(), below=None):
+        self.rows.update(rows)
+        if below is not None and (self.below is None or below < self.below):
+            self.below = below
+
+    def pending(self):
+        return self.enabled and (self.rows or self.below is not None)
+
+    def due(self):
+        return self.pending() and time.monotonic() - self.last >= AUTOSAVE_S
+
+    def _stamp(self):
+        try:
+            st = os.stat(self.base)
+        except OSError:
+            return "!0 0"           # not saved yet
+        return f"!{st[6]} {st[8]}"
+
+    def snapshot(self, buf):
+        n = buf.line_count()
+        below = n if self.below is None else min(self.below, n)
+        try:
+            os.stat(self.path)
+            header = None
+        except OSError:
+            header = self.stamp     # a new swap file
+        try:
+            with open(self.path, "a") as f:
+                if header is not None:
+                    f.write(header + "\n")
+                f.write(f"@{n}\n")
+                for row in sorted(self.rows):
+                    if row < below:
+                        f.write(f"{row}\t{buf.line(row)}\n")
+                for row in range(below, n):
+                    f.write(f"{row}\t{buf.line(row)}\n")
+        except OSError:
+            self.enabled = False    # read-only filesystem: no autosave
+        self.rows = set()
+        self.below = None
+        self.last = time.monotonic()
+
+    def recover(self, lines):
+        """
+        Replay the swap file over lines (the saved file). False if there is
+        none, or if it was taken against another version of the file; that
+        one is moved aside to `stale` rather than replayed.
+        """
+        try:
+            f = open(self.path)
+        except OSError:
+            return False
+        with f:
+            current = f.readline().rstrip("\n") == self._stamp()
+            try:
+                for record in f if current else ():
+                    record = record.rstrip("\n")
+                    if record.startswith("@"):
+                        n = int(record[1:])
+                        del lines[n:]
+                        lines.extend([""] * (n - len(lines)))
+                    else:
+                        row, _, text = record.partition("\t")
+                        lines[int(row)] = text
+            except (ValueError, IndexError):
+                pass            # torn last record: keep what was replayed
+        if not current:
+            self.stale = self.path + ".old"
+            _remove(self.stale)
+            try:
+                os.rename(self.path, self.stale)
+            except OSError:
+                self.stale = None
+        return current
+
+    def discard(self):
+        """Drop the swap file; the file on disk is the new base."""
+        _remove(self.path)
+        self.stamp = self._stamp()
+        self.rows = set()
+        self.below = None
+        self.last = time.monotonic()
+
+
+def _read_text(path):
+    """
+    (text, replaced) for path: its contents as editor text, one byte per
+    column, so non-ASCII characters become "?". A missing file is empty.
+    """
+    try:
+        with open(path) as f:
+            text = f.read()
+    except OSError:
+        return "", False
+    if any(c >= "\x80" for c in text):
+        return "".join(c if c < "\x80" else "?" for c in text), True
+    return text, False
+
+
+class Document:
+    """
+    One open buffer with its undo log, highlighter and swap file. While
+    another document is active the gap buffer is packed into a single
+    bytearray with no gap; see compact() for what happens past the budget.
+    """
+    _clock = 0
+
+    def __init__(self, path=None, text="", syntax=None):
+        self.path = path
+        self.buf = GapBuffer(text)
+        self.undo = UndoLog()
+        self.swap = Swap(path) if path is not None else None
+        if syntax is None and path is not None and path.endswith(".py"):
+            syntax = "python"
+        self.hl = Highlighter() if syntax == "python" else None
+        self.modified = False
+        self.lossy = False      # text differs from the file (non-ASCII replaced)
+        self.cursor = (0, 0)
+        self.top = (0, 0)       # window (row, col)
+        self.used = 0
+        self._blob = None       # packed text while inactive
+        self._spill = None      # ... or the file it was spilled to
+
+    @classmethod
+    def open(cls, path, syntax=None):
+        """(document, status message or None) for path, replaying any swap file."""
+        text, replaced = _read_text(path)
+        message = None
+        swap = Swap(path)
+        lines = text.split("\n")
+        recovered = swap.recover(lines)
+        if recovered:
+            text = "\n".join(lines)
+            message = f"Recovered unsaved changes from {swap.path} (^X r reverts)"
+        elif swap.stale is not None:
+            message = f"{path} changed since its swap file; kept it as {swap.stale}"
+        del lines
+        doc = cls(path, text, syntax)
+        if replaced:
+            message = "Non-ASCII characters replaced with ?; ^S saves under a new name"
+        doc.lossy = replaced
+        doc.modified = recovered or replaced
+        return doc, message
+
+    @property
+    def name(self):
+        return self.path or "untitled"
+
+    def held(self):
+        """Bytes of packed text this document keeps in RAM."""
+        return len(self._blob) if self._blob is not None else 0
+
+    def pack(self):
+        if self.swap is not None and self.swap.pending():
+            self.swap.snapshot(self.buf)
+        buf = self.buf
+        blob = bytearray(len(buf))
+        i = 0
+        for chunk in buf.chunks():
+            blob[i:i + len(chunk)] = chunk
+            i += len(chunk)
+        self._blob = blob
+        self.buf = None
+
+    def spill(self):
+        """Move the packed text to SPILL_DIR; False if it cannot be written."""
+        name = SPILL_DIR + "/" + self.path.replace("/", "_") + ".buf"
+        try:
+            try:
+                os.mkdir(SPILL_DIR)
+            except OSError:
+                pass            # already there
+            with open(name, "wb") as f:
+                f.write(self._blob)
+        except OSError:
+            return False
+        self._blob = None
+        self._spill = name
+        return True
+
+    def drop(self):
+        """Forget the packed text of an unmodified file; it reloads from disk."""
+        self._blob = None
+
+    def unpack(self):
+        Document._clock += 1
+        self.used = Document._clock
+        if self.buf is not None:
+            return
+        if self._spill is not None:
+            with open(self._spill, "rb") as f:
+                self._blob = f.read()
+            _remove(self._spill)
+            self._spill = None
+        self.buf = GapBuffer(self._blob if self._blob is not None else _read_text(self.path)[0])
+        self._blob = None
+
+
+def compact(docs, budget=BUFFER_BUDGET):
+    """
+    Keep the packed text of inactive documents under budget bytes, least
+    recently used first: unmodified files are dropped (they reload from
+    disk) and modified ones spill to SPILL_DIR. Documents without a path
+    always stay in RAM; their text may be meant to stay off the card.
+    """
+    held = sum(d.held() for d in docs)
+    for d in sorted(docs, key=lambda d: d.used):
+        if held <= budget:
+            break
+        n = d.held()
+        if d.buf is not None or d.path is None or not n:
+            continue
+        if d.modified:
+            if not d.spill():
+                continue
+        else:
+            d.drop()
+        held -= n
+
+
+def editor(stdscr, terminal_tilegrid, on_save="", syntax=None, path=None):
     class MockCursor:
         def __init__(self, row, col):
             self.row = row
             self.col = col
             
     window = Window(terminal_tilegrid.height - 1, terminal_tilegrid.width)  # -1 for status line
-    stdscr.erase()
-    img = [None] * (window.n_rows + 1)  # +1 for status line
+    # Text goes straight to the TileGrid's tiles; only changed cells are written
+    vs = helpers.VScreen(terminal_tilegrid, terminal_tilegrid.width, terminal_tilegrid.height)
+    tpm = terminal_tilegrid.pixel_shader
     status_message_row = terminal_tilegrid.height - 1
+    text_rows = window.n_rows
+    pane_rows = 0       # rows taken from the bottom of the text by ^R output
     cursor_row, cursor_col = 0, 0
     status_changed = False
 
-    # Store lines of text
-    lines = [""]
+    # Open documents; the active one's gap buffer, undo log, swap file and
+    # highlighter are unpacked into the locals below
+    if path is not None:
+        doc, opened = Document.open(path, syntax)
+    else:
+        doc, opened = Document(syntax=syntax), None
+    doc.unpack()
+    docs = [doc]
+    active = 0
+    chord = False       # ^X pressed: the next key picks a buffer
+    redraw_all = False  # the text window changed (document, output pane): redraw it
+
+    # Text lives in a gap buffer; rows are read back with buf.line(row)
+    buf, undo, swap, hl = doc.buf, doc.undo, doc.swap, doc.hl
 
     cursor = MockCursor(cursor_row, cursor_col)
 
+    # Buffer rows changed by the last edit; dirty_from marks "this row and
+    # everything below" (line count changed)
+    dirty = set()
+    dirty_from = None
+    shown = None        # screen cell currently highlighted as the cursor
+    lit = set()         # screen cells currently highlighted as matches
+
+    # Token class of each text cell as last pushed to the palette mapper
+    style = bytearray(window.n_cols * window.n_rows)
+
+    search = Search()
+    searching = False   # keys go to the Find prompt
+    origin = (0, 0)     # cursor position when the Find prompt opened
+
     def setline(row, line):
-        if img[row] == line:
+        vs.put_line(row, line)
+
+    def draw_row(row):
+        buffer_row = window.row + row
+        if buffer_row >= buf.line_count():
+            vs.put_line(row, "")
+            paint_row(row)
             return
-        img[row] = line
-        line += " " * (window.n_cols - len(line) - 1)
-        stdscr.addstr(row, 0, line)
+        # Apply horizontal scroll; only the visible span is decoded
+        visible_line = buf.line(buffer_row, window.col, window.n_cols)
+        if window.col > 0:
+            visible_line = "«" + visible_line[1:]  # Add scroll indicator
+        if len(visible_line) > window.n_cols - 1:
+            visible_line = visible_line[:window.n_cols - 2] + "»"  # Add right indicator
+        vs.put_line(row, visible_line)
+        paint_row(row)
 
-    def get_user_input(prompt_text):
-        """Prompt the user for input on the status line and return the entered string."""
-        stdscr.addstr(status_message_row, 0, prompt_text + (" "*(window.n_cols - len(prompt_text) - 1)))
+    def paint_row(row):
+        # Push only the cells whose token class changed; without a
+        # highlighter every cell wants plain, which clears a previous
+        # document's colours
+        buffer_row = window.row + row
+        want = bytearray(window.n_cols)
+        if hl is not None and buffer_row < buf.line_count():
+            for start, end, kind in hl.spans(buf, buffer_row):
+                for x in range(max(start - window.col, 0), min(end - window.col, window.n_cols)):
+                    want[x] = kind
+        base = row * window.n_cols
+        for x in range(window.n_cols):
+            if style[base + x] != want[x]:
+                style[base + x] = want[x]
+                cell = (x, row)
+                if cell != shown and cell not in lit:
+                    tpm[cell] = COLORS[want[x]]
+
+    def plain(cell):
+        return COLORS[style[cell[1] * window.n_cols + cell[0]]]
+
+    def paint_matches():
+        # Only visible rows are searched for highlighting
+        nonlocal lit
+        cells = set()
+        if search.active:
+            for row in range(min(window.n_rows, buf.line_count() - window.row)):
+                for start, end in search.matches(buf, window.row + row):
+                    for x in range(max(start - window.col, 0), min(end - window.col, window.n_cols)):
+                        cells.add((x, row))
+        for cell in lit - cells:
+            tpm[cell] = plain(cell)
+        for cell in cells - lit:
+            tpm[cell] = [2, 0]
+        lit = cells
+
+    def show_cursor():
+        nonlocal shown
+        cell = (cursor_col - window.col, cursor_row - window.row)
+        if shown is not None and shown != cell and 0 <= shown[0] < window.n_cols and 0 <= shown[1] < window.n_rows:
+            tpm[shown] = [2, 0] if shown in lit else plain(shown)
+        if 0 <= cell[0] < window.n_cols and 0 <= cell[1] < window.n_rows:
+            tpm[cell] = [1, 0]
+        shown = cell
+
+    def frame():
+        # Tile and palette-mapper changes go out in one refresh
+        paint_matches()
+        show_cursor()
+        vs.commit()
         helpers._display.refresh()
+
+    def activate(i, close=False):
+        """Make docs[i] the active document; close drops the current one."""
+        nonlocal active, doc, buf, undo, swap, hl, path, cursor_row, cursor_col, redraw_all
+        if close:
+            if swap is not None and swap.pending():
+                swap.snapshot(buf)
+            docs.pop(active)
+        else:
+            doc.cursor = (cursor_row, cursor_col)
+            doc.top = (window.row, window.col)
+            doc.pack()
+        active = i
+        doc = docs[i]
+        doc.unpack()
+        compact(docs)
+        buf, undo, swap, hl, path = doc.buf, doc.undo, doc.swap, doc.hl, doc.path
+        cursor_row, cursor_col = doc.cursor
+        window.row, window.col = doc.top
+        search.forget(below=0)
+        redraw_all = True
+        setline(status_message_row, f"[{active + 1}/{len(docs)}] {doc.name}")
+
+    def open_pane(lines):
+        # The pane takes the bottom rows from the text window
+        nonlocal pane_rows, lit, shown, redraw_all
+        rows = min(OUTPUT_ROWS, text_rows // 2)
+        top = text_rows - rows
+        if not pane_rows:
+            for cell in lit:
+                tpm[cell] = plain(cell)
+            lit = set()
+            for y in range(top, text_rows):
+                for x in range(window.n_cols):
+                    style[y * window.n_cols + x] = 0
+                    tpm[x, y] = [2, 0] if y == top else [0, 1]
+            if shown is not None and shown[1] >= top:
+                shown = None
+            window.n_rows = top
+            pane_rows = rows
+            redraw_all = True
+        vs.put_line(top, f" Output: {doc.name}  ESC closes ")
+        tail = lines[-(rows - 1):]
+        for i in range(rows - 1):
+            vs.put_line(top + 1 + i, tail[i][:window.n_cols] if i < len(tail) else "")
+
+    def close_pane():
+        nonlocal pane_rows, redraw_all
+        for x in range(window.n_cols):
+            tpm[x, window.n_rows] = [0, 1]
+        window.n_rows = text_rows
+        pane_rows = 0
+        redraw_all = True
+
+    def run():
+        """Compile the buffer and run it in a kernel sandbox, output to the pane."""
+        import fsio     # pylint: disable=import-outside-toplevel
+        import kernel   # pylint: disable=import-outside-toplevel
+
+        out = []
+
+        def capture(*args, sep=" ", end="\n", flush=False):
+            out.append(sep.join(str(a) for a in args) + end)
+
+        env = kernel.sandbox(print=capture, printf=capture,
+                             input=lambda prompt="": get_user_input(prompt, ""))
+        try:
+            exec(compile(buf.text(), doc.name, "exec"), env)
+            # Like kernel.exe: a main(args, cwd) is called and its result shown
+            result = env["main"]([doc.name], fsio.Path()) if "main" in env else None
+            if result:
+                capture(result)
+            capture("[done]")
+        except kernel.ProgramExit as e:
+            capture(f"[exit {e.code}] {e.message}")
+        except KeyboardInterrupt:
+            capture("[interrupted]")
+        except Exception as e:  # pylint: disable=broad-except
+            capture(f"{type(e).__name__}: {e}")
+        lines = "".join(out).split("\n")
+        open_pane(lines[:-1])
+
+    def get_user_input(prompt_text, default="output.txt"):
+        """Prompt the user for input on the status line and return the entered string."""
         user_input = ""
         while True:
+            setline(status_message_row, prompt_text + " " + user_input)
+            vs.commit()
+            helpers._display.refresh()
             k = stdscr.getkey()
-            if k is not None:
-                if k in ("\n", "\r"):
-                    break
-                elif k in {"KEY_BACKSPACE", "\x7f", "\x08"}:
-                    if len(user_input) > 0:
-                        user_input = user_input[:-1]
-                        stdscr.addstr(status_message_row, len(prompt_text) + 1, user_input + " ")
-                        stdscr.move(status_message_row, len(prompt_text) + 1 + len(user_input))
-                elif len(k) == 1 and " " <= k <= "~":
-                    user_input += k
-                    stdscr.addstr(status_message_row, len(prompt_text) + 1, user_input)
-                helpers._display.refresh()
-        return user_input.strip() or "output.txt"
-
-    setline(status_message_row, " (mnt RO ^W) | ^R Run | ^O Open | ^F Find | ^G GoTo | ^C quit ")
-    helpers._display.refresh()
+            while k is None:
+                k = stdscr.getkey()
+            if k in ("\n", "\r"):
+                break
+            elif k in {"KEY_BACKSPACE", "\x7f", "\x08"}:
+                user_input = user_input[:-1]
+            elif len(k) == 1 and " " <= k <= "~":
+                user_input += k
+        return user_input.strip() or default
+
+    setline(status_message_row, opened or " (mnt RO ^W) | ^R Run | ^O Open | ^F Find | ^G GoTo | ^C quit ")
+    status_changed = opened is not None
+    for row in range(window.n_rows):
+        draw_row(row)
+    frame()
 
     while True:
         # Create a mock cursor object for window methods
         
         
-        k = stdscr.getkey()
+        try:
+            k = stdscr.getkey()
+        except KeyboardInterrupt:
+            # ^C quits; unsaved edits stay in the swap file for next time
+            if swap is not None and swap.pending():
+                swap.snapshot(buf)
+            raise
+        if swap is not None and swap.due():
+            swap.snapshot(buf)
         if k is not None:
             if status_changed:
                 setline(status_message_row, " (mnt RO ^W) | ^S Save | ^O Open | ^F Find | ^G GoTo | ^C quit ")
                 status_changed = False
 
-            old_cursor_pos = (cursor_col, cursor_row)
             old_window_pos = (window.col, window.row)
-            
-            if len(k) == 1 and " " <= k <= "~":
+            old_line_count = buf.line_count()
+
+            if searching:
+                if k in ("\n", "\r"):
+                    searching = False       # keep the matches lit for ^N/^P
+                    status_changed = True
+                elif k == "\x1b":
+                    searching = False
+                    search.active = False
+                    cursor_row, cursor_col = origin
+                    status_changed = True
+                else:
+                    if k in ("\x0e", "\x10"):     # ^N / ^P
+                        hit = search.find(buf, cursor_row, cursor_col, 1 if k == "\x0e" else -1)
+                    else:
+                        if k in {"KEY_BACKSPACE", "\x7f", "\x08"}:
+                            search.set_query(search.query[:-1])
+                        elif k == "\x14":          # ^T
+                            search.toggle(ignore_case=not search.ignore_case)
+                        elif k == "\x05":          # ^E
+                            search.toggle(regex=not search.regex)
+                        elif len(k) == 1 and " " <= k <= "~":
+                            search.set_query(search.query + k)
+                        hit = search.find(buf, origin[0], origin[1], 0)
+                    if hit is not None:
+                        cursor_row, cursor_col = hit
+                    setline(status_message_row, search.status())
+            elif chord:
+                chord = False
+                status_changed = True
+                n = len(docs)
+                if k == "n":
+                    activate((active + 1) % n)
+                elif k == "p":
+                    activate((active - 1) % n)
+                elif "1" <= k <= "9" and int(k) <= n:
+                    activate(int(k) - 1)
+                elif k == "k" and n > 1:
+                    if path is None:
+                        # The caller's own text: it only leaves through ^S
+                        setline(status_message_row, f"Can't close {doc.name}; ^S returns it")
+                    elif doc.modified and get_user_input(
+                            f"{doc.name} has unsaved changes; close anyway? (y/N)", "n").lower() != "y":
+                        setline(status_message_row, f"[{active + 1}/{n}] {doc.name}")
+                    else:
+                        activate(min(active, n - 2), close=True)
+                elif k == "r" and path is not None:
+                    # Revert to the file on disk, dropping the swap file too
+                    swap.discard()
+                    docs[active], message = Document.open(path, "python" if hl else "")
+                    activate(active)
+                    if message is not None:
+                        setline(status_message_row, message)
+                else:
+                    setline(status_message_row, f"[{active + 1}/{n}] {doc.name}")
+            elif len(k) == 1 and " " <= k <= "~":
                 # Insert character at cursor position
-                lines[cursor_row] = lines[cursor_row][:cursor_col] + k + lines[cursor_row][cursor_col:]
+                dirty.add(cursor_row)
+                undo.insert(cursor_row, cursor_col, k)
+                buf.insert(buf.pos(cursor_row, cursor_col), k)
                 cursor_col += 1
             elif k == "\n":
                 # Split line at cursor position
-                current_line = lines[cursor_row]
-                lines[cursor_row] = current_line[:cursor_col]
-                lines.insert(cursor_row + 1, current_line[cursor_col:])
+                dirty_from = cursor_row
+                undo.insert(cursor_row, cursor_col, "\n")
+                buf.insert(buf.pos(cursor_row, cursor_col), "\n")
                 cursor_row += 1
                 cursor_col = 0
+            elif k == "KEY_PASTE":
+                # Insert the whole paste at once; one column per character
+                text = "".join(c if c < "\x80" else "?" for c in stdscr.paste.replace("\t", "    "))
+                pos = buf.pos(cursor_row, cursor_col)
+                dirty_from = cursor_row
+                undo.insert(cursor_row, cursor_col, text)
+                buf.insert(pos, text)
+                cursor_row, cursor_col = buf.row_col(pos + len(text))
             elif k in {"KEY_BACKSPACE", "\x7f", "\x08"}:
                 if cursor_col > 0:
                     # Delete character before cursor
-                    lines[cursor_row] = lines[cursor_row][:cursor_col - 1] + lines[cursor_row][cursor_col:]
+                    dirty.add(cursor_row)
+                    undo.delete(cursor_row, cursor_col - 1, buf.line(cursor_row, cursor_col - 1, 1))
+                    buf.delete(buf.pos(cursor_row, cursor_col) - 1, 1)
                     cursor_col -= 1
                 elif cursor_row > 0:
-                    # Join with previous line
-                    cursor_col = len(lines[cursor_row - 1])
-                    lines[cursor_row - 1] += lines[cursor_row]
-                    lines.pop(cursor_row)
+                    # Join with previous line by deleting its newline
+                    cursor_col = buf.line_len(cursor_row - 1)
+                    dirty_from = cursor_row - 1
+                    undo.delete(cursor_row - 1, cursor_col, "\n")
+                    buf.delete(buf.pos(cursor_row, 0) - 1, 1)
                     cursor_row -= 1
+            elif k in ("\x1a", "\x19"):  # Ctrl-Z undo / Ctrl-Y redo
+                op = undo.undo() if k == "\x1a" else undo.redo()
+                if op is None:
+                    setline(status_message_row, "Nothing to undo" if k == "\x1a" else "Nothing to redo")
+                    status_changed = True
+                else:
+                    kind, row, col, text = op
+                    pos = buf.pos(row, col)
+                    # Undoing an insert, or redoing a delete, removes the text
+                    if (kind == INSERT) == (k == "\x1a"):
+                        buf.delete(pos, len(text))
+                        cursor_row, cursor_col = row, col
+                    else:
+                        buf.insert(pos, text)
+                        cursor_row, cursor_col = buf.row_col(pos + len(text))
+                    dirty_from = row
             elif k == "KEY_LEFT":
                 if cursor_col > 0:
                     cursor_col -= 1
                 elif cursor_row > 0:
                     cursor_row -= 1
-                    cursor_col = len(lines[cursor_row])
+                    cursor_col = buf.line_len(cursor_row)
             elif k == "KEY_RIGHT":
-                if cursor_col < len(lines[cursor_row]):
+                if cursor_col < buf.line_len(cursor_row):
                     cursor_col += 1
-                elif cursor_row < len(lines) - 1:
+                elif cursor_row < buf.line_count() - 1:
                     cursor_row += 1
                     cursor_col = 0
             elif k == "KEY_UP":
                 if cursor_row > 0:
                     cursor_row -= 1
-                    cursor_col = min(cursor_col, len(lines[cursor_row]))
+                    cursor_col = min(cursor_col, buf.line_len(cursor_row))
             elif k == "KEY_DOWN":
-                if cursor_row < len(lines) - 1:
+                if cursor_row < buf.line_count() - 1:
                     cursor_row += 1
-                    cursor_col = min(cursor_col, len(lines[cursor_row]))
-            elif k == "\x13":  # Ctrl+S
+                    cursor_col = min(cursor_col, buf.line_len(cursor_row))
+            elif k == "\x13" and path is not None:  # Ctrl+S
+                target = path
+                if doc.lossy:
+                    # "?" stands in for non-ASCII text: never write it over the original
+                    target = get_user_input("Non-ASCII was replaced; save as:", "")
+                    if target == path:
+                        target = ""
+                if not target:
+                    setline(status_message_row, f"Not saved: {path} has non-ASCII text")
+                else:
+                    try:
+                        save_buffer(buf, target)
+                        swap.discard()
+                        if target != path:
+                            path = doc.path = target
+                            swap = doc.swap = Swap(target)
+                            swap.discard()
+                            doc.lossy = False
+                        doc.modified = False
+                        setline(status_message_row, f"Saved {path}")
+                    except OSError as e:
+                        setline(status_message_row, f"Error saving file: {e}")
+                status_changed = True
+            elif k == "\x13":
                 closing_input = get_user_input(on_save)
-                return closing_input, "\n".join(lines)
+                return closing_input, buf.text()
                 #try:
                 #    with open(f"sd/{filename}", "w") as f:
                 #        f.write("\n".join(lines))
@@ -146,27 +849,55 @@ def editor(stdscr, terminal_tilegrid, on_save=""):
                 #except Exception as e:
                 #    setline(status_message_row, f"Error saving file: {e}")
                 #status_changed = True
-            elif k == "\x06":  # Ctrl-F
-                search_term = get_user_input("Find:")
-                found = False
-                for i, line in enumerate(lines):
-                    col = line.find(search_term)
-                    if col != -1:
-                        cursor_row, cursor_col = i, col
-                        found = True
+            elif k == "\x0f":  # Ctrl-O
+                name = get_user_input("Open file:", "")
+                status_changed = True
+                for i, d in enumerate(docs):
+                    if d.path == name:
+                        activate(i)
                         break
-                if found:
-                    setline(status_message_row, f"Found '{search_term}'")
                 else:
-                    setline(status_message_row, f"'{search_term}' not found")
+                    if name:
+                        new, message = Document.open(name)
+                        docs.append(new)
+                        activate(len(docs) - 1)
+                        if message is not None:
+                            setline(status_message_row, message)
+                    else:
+                        setline(status_message_row, f"[{active + 1}/{len(docs)}] {doc.name}")
+            elif k == "\x18":  # Ctrl-X: buffer chord
+                chord = True
+                setline(status_message_row, f"[{active + 1}/{len(docs)}] ^X n/p next/prev  1-9 buffer  k close  r revert")
+            elif k == "\x06":  # Ctrl-F
+                searching = True
+                search.active = True
+                origin = (cursor_row, cursor_col)
+                setline(status_message_row, search.status())
+            elif k in ("\x0e", "\x10"):  # Ctrl-N / Ctrl-P: find next / previous
+                hit = None
+                if search.query:
+                    search.active = True
+                    hit = search.find(buf, cursor_row, cursor_col, 1 if k == "\x0e" else -1)
+                if hit is not None:
+                    cursor_row, cursor_col = hit
+                else:
+                    setline(status_message_row, f"'{search.query}' not found")
+                    status_changed = True
+            elif k == "\x1b":  # ESC clears the match highlight and closes the output
+                search.active = False
+                if pane_rows:
+                    close_pane()
+            elif k == "\x12":  # Ctrl-R: run the buffer
+                run()
+                setline(status_message_row, f"Ran {doc.name}")
                 status_changed = True
             elif k == "\x07":  # Ctrl+G
                 line_str = get_user_input("Go to line:")
                 try:
                     target = int(line_str) - 1
-                    if 0 <= target < len(lines):
+                    if 0 <= target < buf.line_count():
                         cursor_row = target
-                        cursor_col = min(cursor_col, len(lines[cursor_row]))
+                        cursor_col = min(cursor_col, buf.line_len(cursor_row))
                         setline(status_message_row, f"Moved to line {target + 1}")
                     else:
                         setline(status_message_row, "Line out of range")
@@ -176,51 +907,78 @@ def editor(stdscr, terminal_tilegrid, on_save=""):
 
 
 
+            if k.startswith("KEY_") and k != "KEY_PASTE":
+                undo.seal()     # moving the cursor ends the current undo step
+            if dirty or dirty_from is not None:
+                search.forget(dirty, dirty_from)
+                doc.modified = True
+                if swap is not None:
+                    swap.touch(dirty, dirty_from)
+                if hl is not None:
+                    hl.edit(min(dirty) if dirty else dirty_from, buf.line_count() - old_line_count)
+
             # Update cursor position for window methods
             cursor.col = cursor_col
             cursor.row = cursor_row
             
             # Trigger vertical scrolling
             window.up(cursor)
-            window.down(lines, cursor)
+            window.down(buf.line_count(), cursor)
+            if cursor_row < window.row:
+                window.row = cursor_row
+            elif cursor_row > window.bottom:
+                window.row = cursor_row - window.n_rows + 1
             
             # Trigger horizontal scrolling
             window.horizontal_scroll(cursor)
             
-            # Render all visible lines
-            for row in range(window.n_rows):
-                buffer_row = window.row + row
-                if buffer_row < len(lines):
-                    line = lines[buffer_row]
-                    # Apply horizontal scroll
-                    visible_line = line[window.col:]
-                    if window.col > 0:
-                        visible_line = "«" + visible_line[1:]  # Add scroll indicator
-                    if len(visible_line) > window.n_cols - 1:
-                        visible_line = visible_line[:window.n_cols - 2] + "»"  # Add right indicator
-                    setline(row, visible_line)
-            
-            # Only update pixel shader if screen position actually changed
-            old_screen_col = old_cursor_pos[0] - old_window_pos[0]
-            old_screen_row = old_cursor_pos[1] - old_window_pos[1]
-            new_screen_col = cursor_col - window.col
-            new_screen_row = cursor_row - window.row
-            
-            if (old_screen_col != new_screen_col or old_screen_row != new_screen_row):
-                # Make sure old position is within bounds
-                if (0 <= old_screen_col < window.n_cols and 0 <= old_screen_row < window.n_rows):
-                    terminal_tilegrid.pixel_shader[old_screen_col, old_screen_row] = [0, 1]
-                # Make sure new position is within bounds
-                if (0 <= new_screen_col < window.n_cols and 0 <= new_screen_row < window.n_rows):
-                    terminal_tilegrid.pixel_shader[new_screen_col, new_screen_row] = [1, 0]
-            
-            helpers._display.refresh()
+            # A scroll shifts what is already drawn; only exposed rows are rendered
+            shift = window.row - old_window_pos[1]
+            if redraw_all or window.col != old_window_pos[0] or abs(shift) >= window.n_rows:
+                dirty_from = window.row
+                redraw_all = False
+            elif shift:
+                vs.scroll(shift, 0, window.n_rows)
+                exposed = range(window.n_rows - shift, window.n_rows) if shift > 0 else range(-shift)
+                for row in exposed:
+                    draw_row(row)
+                # Colours stay on their cells: recolour the rows that moved
+                for row in range(window.n_rows):
+                    if row not in exposed:
+                        paint_row(row)
+
+            # Redraw the rows the edit touched
+            if dirty_from is not None:
+                for row in range(max(dirty_from - window.row, 0), window.n_rows):
+                    draw_row(row)
+            for buffer_row in dirty:
+                if 0 <= buffer_row - window.row < window.n_rows:
+                    draw_row(buffer_row - window.row)
+            dirty.clear()
+            dirty_from = None
+
+            # Lex down to the last visible row and recolour the rows whose
+            # start state the edit changed (e.g. an opened triple quote)
+            if hl is not None:
+                bottom = min(window.row + window.n_rows, buf.line_count())
+                hl.start_state(buf, bottom)
+                if hl.restyled is not None:
+                    first, last = hl.restyled
+                    for row in range(max(first - window.row, 0), min(last - window.row + 1, window.n_rows)):
+                        paint_row(row)
+                    hl.restyled = None
+
+            frame()
 
-def get(on_save=""):
-    highlight_palette = displayio.Palette(3)
+def get(on_save="", syntax=None, path=None):
+    highlight_palette = displayio.Palette(7)
     highlight_palette[0] = 0x000000
     highlight_palette[1] = 0xFFFFFF
     highlight_palette[2] = 0xC9C9C9
+    highlight_palette[3] = 0xFF9E3B     # keyword
+    highlight_palette[4] = 0x98C379     # string
+    highlight_palette[5] = 0x7F848E     # comment
+    highlight_palette[6] = 0x61AFEF     # number
 
     tpm = TilePaletteMapper(highlight_palette, 2)
 
@@ -241,7 +999,7 @@ def get(on_save=""):
     helpers._display.root_group.append(area)
 
     try:
-        result = curses.custom_terminal_wrapper(term, editor, area, on_save)
+        result = curses.custom_terminal_wrapper(term, editor, area, on_save, syntax, path)
     except KeyboardInterrupt:
         helpers._display.root_group.pop(-1)
         helpers._display.refresh()  
@@ -0,0 +1,178 @@
+"""
+Gap buffer with a line-start index, used by the editor.
+
+Text is held in one bytearray with a movable gap at the edit point, so
+typing and deleting next to the cursor only touch a few bytes. Growing
+the gap doubles the buffer, which keeps inserts O(1) amortized.
+
+Line starts are kept as *physical* offsets into that bytearray. Starts
+before the gap equal their logical offset; starts after it are shifted by
+the gap length. An edit at the gap therefore leaves every start alone,
+and only the starts the gap moves across are adjusted. A start that falls
+exactly at the gap is always stored on the left side (at gap_start).
+
+Text is stored as UTF-8 bytes, one per column only for ASCII, so callers
+should only insert characters below 0x80 (the editor maps anything else
+to "?").
+"""
+
+MIN_GAP = 64
+
+
+def _bisect_right(a, x, lo=0):
+    hi = len(a)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if x < a[mid]:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+class GapBuffer:
+    def __init__(self, text="", gap=MIN_GAP):
+        data = text.encode() if isinstance(text, str) else bytes(text)
+        self._buf = bytearray(len(data) + gap)
+        self._buf[gap:] = data
+        self._gs = 0                    # gap start (first free byte)
+        self._ge = gap                  # gap end (first byte after the gap)
+        # Line 0 starts at logical 0, which is the gap: stored at 0
+        self._starts = [0] + [gap + i + 1 for i in range(len(data)) if data[i] == 10]
+
+    # --- Sizes ---------------------------------------------------------------
+    def __len__(self):
+        return len(self._buf) - (self._ge - self._gs)
+
+    def line_count(self):
+        return len(self._starts)
+
+    def _logical(self, p):
+        return p if p <= self._gs else p - (self._ge - self._gs)
+
+    def _line_bounds(self, row):
+        """Logical [start, end) of row, excluding its newline."""
+        start = self._logical(self._starts[row])
+        if row + 1 < len(self._starts):
+            end = self._logical(self._starts[row + 1]) - 1
+        else:
+            end = len(self)
+        return start, end
+
+    def line_len(self, row):
+        start, end = self._line_bounds(row)
+        return end - start
+
+    def pos(self, row, col):
+        """Logical offset of (row, col)."""
+        return self._logical(self._starts[row]) + col
+
+    def row_col(self, pos):
+        """(row, col) of a logical offset."""
+        gs = self._gs
+        p = pos if pos <= gs else pos + (self._ge - gs)
+        row = _bisect_right(self._starts, p) - 1
+        return row, pos - self._logical(self._starts[row])
+
+    # --- Reading ---------------------------------------------------------------
+    def _slice(self, start, end):
+        """Bytes for logical [start, end), joining across the gap if needed."""
+        gs = self._gs
+        buf = self._buf
+        if end <= gs:
+            return buf[start:end]
+        gap = self._ge - gs
+        if start >= gs:
+            return buf[start + gap:end + gap]
+        return buf[start:gs] + buf[self._ge:end + gap]
+
+    def line(self, row, col=0, width=None):
+        """Text of row, optionally only [col, col + width)."""
+        start, end = self._line_bounds(row)
+        start = min(start + col, end)
+        if width is not None:
+            end = min(end, start + width)
+        return self._slice(start, end).decode()
+
+    def text(self):
+        return self._slice(0, len(self)).decode()
+
+    def chunks(self):
+        """The text as (at most two) memoryview slices, without copying."""
+        mv = memoryview(self._buf)
+        if self._gs:
+            yield mv[:self._gs]
+        if self._ge < len(self._buf):
+            yield mv[self._ge:]
+
+    # --- Editing ---------------------------------------------------------------
+    def _move_gap(self, pos):
+        gs, ge = self._gs, self._ge
+        if pos == gs:
+            return
+        buf = self._buf
+        starts = self._starts
+        gap = ge - gs
+        if pos < gs:
+            n = gs - pos
+            buf[ge - n:ge] = buf[pos:gs]
+            # starts in (pos, gs] move to the right side of the gap
+            i = _bisect_right(starts, pos)
+            while i < len(starts) and starts[i] <= gs:
+                starts[i] += gap
+                i += 1
+        else:
+            n = pos - gs
+            buf[gs:pos] = buf[ge:ge + n]
+            # starts in [ge, ge + n] move to the left side of the gap
+            i = _bisect_right(starts, ge - 1)
+            while i < len(starts) and starts[i] <= ge + n:
+                starts[i] -= gap
+                i += 1
+        self._gs = pos
+        self._ge = pos + gap
+
+    def _grow(self, need):
+        buf = self._buf
+        gs, ge = self._gs, self._ge
+        size = max(len(buf) * 2, len(buf) + need + MIN_GAP)
+        delta = size - len(buf)
+        new = bytearray(size)
+        new[:gs] = buf[:gs]
+        new[ge + delta:] = buf[ge:]
+        starts = self._starts
+        for i in range(_bisect_right(starts, gs), len(starts)):
+            starts[i] += delta
+        self._buf = new
+        self._ge = ge + delta
+
+    def insert(self, pos, text):
+        data = text.encode() if isinstance(text, str) else text
+        n = len(data)
+        if not n:
+            return
+        self._move_gap(pos)
+        if self._ge - self._gs < n:
+            self._grow(n)
+        gs = self._gs
+        self._buf[gs:gs + n] = data
+        self._gs = gs + n
+        if 10 in data:
+            new = [gs + i + 1 for i in range(n) if data[i] == 10]
+            i = _bisect_right(self._starts, gs)
+            self._starts[i:i] = new
+
+    def delete(self, pos, n):
+        """Remove n characters starting at logical pos."""
+        n = min(n, len(self) - pos)
+        if n <= 0:
+            return
+        self._move_gap(pos)
+        ge = self._ge
+        if 10 in self._buf[ge:ge + n]:
+            # drop starts that followed a deleted newline: physical (ge, ge + n]
+            starts = self._starts
+            i = _bisect_right(starts, ge)
+            j = _bisect_right(starts, ge + n)
+            del starts[i:j]
+        self._ge = ge + n
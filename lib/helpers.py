@@ -1,9 +1,10 @@
-import supervisor, sys, displayio, select as sel
+import supervisor, displayio, array
 from terminalio import FONT, Terminal
-from time import sleep
+import inputbus
 
 _display = supervisor.runtime.display
 _builtin_print = print
+_bus = inputbus.bus
 
 # --- Constants --------------------------------------------------------------
 char_w, char_h = FONT.get_bounding_box()
@@ -47,11 +48,344 @@ def set_attributes(*attrs): _tw(f"\x1b[{';'.join(str(a) for a in attrs)}m")
 def set_title(title): _tw(f"\x1b]0;{title}\x1b\\")
 
 
+# --- Virtual screen ---------------------------------------------------------
+_tiles = None
+
+def _tile_table():
+    """Char code (0-255) -> FONT tile index, built once on first use."""
+    global _tiles
+    if _tiles is None:
+        blank = FONT.get_glyph(32).tile_index
+        _tiles = array.array("H", [blank] * 256)
+        for c in range(33, 256):
+            g = FONT.get_glyph(c)
+            if g is not None:
+                _tiles[c] = g.tile_index
+    return _tiles
+
+def tile_for(ch):
+    """Tile index for a single character (falls back to blank)."""
+    c = ord(ch)
+    if c < 256:
+        return _tile_table()[c]
+    g = FONT.get_glyph(c)
+    return g.tile_index if g is not None else _tile_table()[32]
+
+
+class VScreen:
+    """
+    Tile-level back buffer for a terminal TileGrid.
+    Text is drawn into `cells`; commit() diffs them against the last
+    committed frame and writes only changed tiles, skipping the Terminal
+    escape parser entirely.
+    """
+    def __init__(self, tilegrid=None, width=SCR_W, height=SCR_H):
+        self.width = width
+        self.height = height
+        self.tilegrid = tilegrid
+        self.blank = _tile_table()[32]
+        n = width * height
+        self.cells = array.array("H", [self.blank] * n)   # back buffer
+        self.front = array.array("H", [0xFFFF] * n)       # last committed
+        self._blank_row = array.array("H", [self.blank] * width)
+        self._dirty = bytearray(b"\x01" * height)
+
+    def attach(self, tilegrid):
+        """Bind to another TileGrid; its contents are unknown, so redraw all."""
+        self.tilegrid = tilegrid
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget the committed frame (e.g. after the Terminal drew over it)."""
+        for i in range(len(self.front)):
+            self.front[i] = 0xFFFF
+        for r in range(self.height):
+            self._dirty[r] = 1
+
+    def clear(self):
+        w = self.width
+        for r in range(self.height):
+            self.cells[r * w:(r + 1) * w] = self._blank_row
+            self._dirty[r] = 1
+
+    def put(self, row, col, text):
+        """Draw text at (row, col), clipped to the row."""
+        if not 0 <= row < self.height or col >= self.width:
+            return
+        tiles = _tile_table()
+        cells = self.cells
+        i = row * self.width + col
+        for ch in text[:self.width - col]:
+            c = ord(ch)
+            cells[i] = tiles[c] if c < 256 else tile_for(ch)
+            i += 1
+        self._dirty[row] = 1
+
+    def put_line(self, row, text, col=0):
+        """Draw text at (row, col) and blank the remainder of the row."""
+        if not 0 <= row < self.height:
+            return
+        w = self.width
+        self.put(row, col, text)
+        end = col + len(text)
+        if end < w:
+            base = row * w
+            self.cells[base + end:base + w] = self._blank_row[:w - end]
+        self._dirty[row] = 1
+
+    def scroll(self, n, top=0, bottom=None):
+        """
+        Shift rows [top, bottom) up by n (down if n is negative) and blank
+        the rows uncovered, for the caller to draw. TileGrid has no scroll
+        offset to move, so commit() still diffs the shifted rows, but none of
+        them has to be rendered from text again.
+        """
+        if bottom is None:
+            bottom = self.height
+        w = self.width
+        cells = self.cells
+        m = abs(n)
+        if m >= bottom - top:
+            exposed = range(top, bottom)
+        elif n > 0:
+            cells[top * w:(bottom - n) * w] = cells[(top + n) * w:bottom * w]
+            exposed = range(bottom - n, bottom)
+        else:
+            cells[(top + m) * w:bottom * w] = cells[top * w:(bottom - m) * w]
+            exposed = range(top, top + m)
+        for r in exposed:
+            cells[r * w:(r + 1) * w] = self._blank_row
+        for r in range(top, bottom):
+            self._dirty[r] = 1
+
+    def commit(self):
+        """Push changed cells to the TileGrid; returns the number written."""
+        tg = self.tilegrid
+        if tg is None:
+            return 0
+        cells, front, w = self.cells, self.front, self.width
+        written = 0
+        for r in range(self.height):
+            if not self._dirty[r]:
+                continue
+            self._dirty[r] = 0
+            base = r * w
+            for x in range(w):
+                t = cells[base + x]
+                if front[base + x] != t:
+                    tg[x, r] = t
+                    front[base + x] = t
+                    written += 1
+        return written
+
+
+# --- Scrollback -------------------------------------------------------------
+# Each console keeps its own ring of fixed-width (SCR_W byte) line records in
+# one bytearray, allocated on its first output. Escape sequences are dropped
+# on the way in; review pages render straight from the ring into the TileGrid.
+SCROLLBACK_BYTES = 16 * 1024
+
+_rings = {}             # console number -> Scrollback
+_sb_saved = None        # live tiles while reviewing history
+
+class Scrollback:
+    def __init__(self, nbytes=SCROLLBACK_BYTES):
+        self.lines = max(nbytes // SCR_W, SCR_H)    # capacity in records
+        self.blank = b" " * SCR_W
+        self.buf = bytearray(self.lines * SCR_W)
+        for i in range(self.lines):
+            self.buf[i * SCR_W:(i + 1) * SCR_W] = self.blank
+        self.head = 0           # record currently being written
+        self.count = 1          # records in use (including the current one)
+        self.col = 0
+        self.esc = 0            # 1 after ESC, 2 inside CSI, 3 inside OSC
+        self.view = 0           # lines scrolled back, 0 = live screen
+
+    def newline(self):
+        self.head = (self.head + 1) % self.lines
+        self.buf[self.head * SCR_W:(self.head + 1) * SCR_W] = self.blank
+        if self.count < self.lines:
+            self.count += 1
+        self.col = 0
+
+    def write(self, s):
+        """Append terminal output to the ring."""
+        buf = self.buf
+        for ch in s:
+            c = ord(ch)
+            esc = self.esc
+            if esc:
+                if esc == 1:
+                    self.esc = 2 if c == 91 else 3 if c == 93 else 0   # '[' / ']'
+                elif esc == 2:
+                    if 0x40 <= c <= 0x7E:
+                        self.esc = 0
+                elif c == 27:
+                    self.esc = 1
+                elif c == 7:
+                    self.esc = 0
+                continue
+            if c == 27:
+                self.esc = 1
+            elif c == 10:
+                self.newline()
+            elif c == 13:
+                self.col = 0
+            elif c == 8:
+                if self.col:
+                    self.col -= 1
+            elif c >= 32:
+                if self.col >= SCR_W:
+                    self.newline()
+                buf[self.head * SCR_W + self.col] = c if c < 256 else 63
+                self.col += 1
+
+    def render(self, tg):
+        tiles = _tile_table()
+        w = SCR_W
+        for y in range(SCR_H):
+            age = self.view + (SCR_H - 1 - y)
+            if age < self.count:
+                base = ((self.head - age) % self.lines) * w
+                for x in range(w):
+                    tg[x, y] = tiles[self.buf[base + x]]
+            else:
+                for x in range(w):
+                    tg[x, y] = tiles[32]
+
+def _ring(n=None):
+    if n is None:
+        n = active_console
+    ring = _rings.get(n)
+    if ring is None:
+        ring = _rings[n] = Scrollback()
+    return ring
+
+def scrollback_init(nbytes=SCROLLBACK_BYTES):
+    """(Re)allocate the active console's scrollback ring with a budget of nbytes."""
+    scrollback_exit()
+    _rings[active_console] = Scrollback(nbytes)
+
+def _sb_write(s):
+    _ring().write(s)
+
+def scrollback_page(pages):
+    """Scroll the review window by pages (positive = further back)."""
+    global _sb_saved
+    tg = CURRENT_TILEGRID
+    ring = _rings.get(active_console)
+    if ring is None or tg is None:
+        return
+    limit = max(ring.count - SCR_H, 0)
+    view = min(max(ring.view + pages * (SCR_H - 1), 0), limit)
+    if view == ring.view:
+        return
+    if not ring.view:
+        # Entering review: stash the live screen so it can be put back as-is.
+        if _sb_saved is None:
+            _sb_saved = array.array("H", [0] * (SCR_W * SCR_H))
+        for y in range(SCR_H):
+            for x in range(SCR_W):
+                _sb_saved[y * SCR_W + x] = tg[x, y]
+    if not view:
+        scrollback_exit()
+        return
+    ring.view = view
+    ring.render(tg)
+
+def scrollback_exit():
+    """Return to the live screen if history is being reviewed."""
+    tg = CURRENT_TILEGRID
+    ring = _rings.get(active_console)
+    if ring is None or not ring.view or tg is None:
+        return
+    for y in range(SCR_H):
+        for x in range(SCR_W):
+            tg[x, y] = _sb_saved[y * SCR_W + x]
+    ring.view = 0
+
+
+# --- Serial mirror ----------------------------------------------------------
+# Console output is copied to USB CDC through a bounded ring drained with a
+# zero write timeout, so a slow or absent host never stalls the display.
+# When the ring is full the oldest bytes are dropped and counted.
+try:
+    import usb_cdc
+    _serial = usb_cdc.console
+except ImportError:
+    _serial = None
+if _serial is not None:
+    _serial.write_timeout = 0
+
+MIRROR_SERIAL = True
+MIRROR_BYTES = 2048
+
+_mq = bytearray(MIRROR_BYTES)
+_mqv = memoryview(_mq)
+_mq_head = 0            # next byte written
+_mq_tail = 0            # next byte sent
+_mq_len = 0
+mirror_dropped = 0      # bytes discarded because the host fell behind
+
+def _mirror(s):
+    global _mq_head, _mq_tail, _mq_len, mirror_dropped
+    if not MIRROR_SERIAL:
+        return
+    if _serial is None:
+        _builtin_print(s, end="")
+        return
+    data = memoryview(s.replace("\n", "\r\n").encode())
+    cap = len(_mq)
+    n = len(data)
+    if n > cap:
+        mirror_dropped += n - cap
+        data = data[n - cap:]
+        n = cap
+    over = _mq_len + n - cap
+    if over > 0:
+        _mq_tail = (_mq_tail + over) % cap
+        _mq_len -= over
+        mirror_dropped += over
+    first = min(n, cap - _mq_head)
+    _mqv[_mq_head:_mq_head + first] = data[:first]
+    if first < n:
+        _mqv[:n - first] = data[first:]
+    _mq_head = (_mq_head + n) % cap
+    _mq_len += n
+    mirror_flush()
+
+def mirror_flush():
+    """Send as much queued mirror output as the host accepts right now."""
+    global _mq_tail, _mq_len
+    if _serial is None:
+        return
+    cap = len(_mq)
+    while _mq_len:
+        chunk = min(_mq_len, cap - _mq_tail)
+        sent = _serial.write(_mqv[_mq_tail:_mq_tail + chunk]) or 0
+        if not sent:
+            return
+        _mq_tail = (_mq_tail + sent) % cap
+        _mq_len -= sent
+
+def set_mirror(enabled):
+    """Turn the serial mirror on or off at runtime (off drops the queue)."""
+    global MIRROR_SERIAL, _mq_head, _mq_tail, _mq_len
+    MIRROR_SERIAL = enabled
+    if not enabled:
+        _mq_head = _mq_tail = _mq_len = 0
+
+def mirror_stats():
+    return {"enabled": MIRROR_SERIAL, "queued": _mq_len, "dropped": mirror_dropped}
+
+
 # --- print wrappers ---------------------------------------------------------
 def print(*args, sep=" ", end="\n", flush=False):
     s = sep.join(str(a) for a in args)
+    scrollback_exit()
+    _sb_write(s + end)
     _tw(s + end)
-    _builtin_print(s, end=end)
+    _mirror(s + end)
     if flush:
         _display.refresh()
 
@@ -59,10 +393,17 @@ def printf(*args, sep=" ", end="\n"):
     print(*args, sep=sep, end=end, flush=True)
 
 
-# --- Create a new terminal and make it CURRENT ------------------------------
-def newTerminal():
-    global CURRENT_TERMINAL, CURRENT_TILEGRID
+# --- Virtual consoles -------------------------------------------------------
+# Console 0 is the kernel shell. The others get their TileGrid/Terminal once,
+# on first use; switching is a single swap of the root group's first slot.
+CONSOLE_COUNT = 4
+_CONSOLE_KEYS = ("KEY_F1", "KEY_F2", "KEY_F3", "KEY_F4")
+PROGRAM_CONSOLE = CONSOLE_COUNT - 1     # handed out by newTerminal()
 
+_consoles = [None] * CONSOLE_COUNT      # (Terminal, TileGrid), made on first use
+active_console = 0
+
+def _make_console():
     area = displayio.TileGrid(
         bitmap=FONT.bitmap,
         width=SCR_W,
@@ -71,27 +412,58 @@ def newTerminal():
         tile_height=char_h,
         pixel_shader=terminal_palette,
     )
+    return Terminal(area, FONT), area
+
+def _console(n):
+    if not 0 <= n < CONSOLE_COUNT:
+        raise ValueError(f"No console {n}")
+    if _consoles[n] is None:
+        _consoles[n] = (KERNEL_TERMINAL, KERNEL_TILEGRID) if n == 0 else _make_console()
+    return _consoles[n]
+
+def chvt(n):
+    """Show console n and make it CURRENT."""
+    global CURRENT_TERMINAL, CURRENT_TILEGRID, active_console
+    term, area = _console(n)
+    root = _display.root_group
+    if root[0] is not area:
+        scrollback_exit()
+        root[0] = area
+        _display.refresh()
+    # Set even when area is already showing: it may have been put there directly
+    CURRENT_TERMINAL = term
+    CURRENT_TILEGRID = area
+    active_console = n
 
-    term = Terminal(area, FONT)
+def console_write(n, s):
+    """Write to console n whether or not it is the one showing."""
+    _console(n)[0].write(s)
+    _ring(n).write(s)
 
-    # Replace display root content with this terminal
-    if _display.root_group:
-        old = _display.root_group.pop(0)
-    _display.root_group.append(area)
 
-    CURRENT_TERMINAL = term
-    CURRENT_TILEGRID = area
-    return term
+# --- Switch to a fresh program terminal and make it CURRENT -----------------
+def newTerminal():
+    # Never the console the user is on: that may be their shell
+    n = PROGRAM_CONSOLE if active_console != PROGRAM_CONSOLE else PROGRAM_CONSOLE - 1
+    chvt(n)
+    _tw("\x1b[2J\x1b[H")
+    return CURRENT_TERMINAL
 
 
 # --- Initialize kernel terminal --------------------------------------------
 def init_kernel_terminal():
     global KERNEL_TERMINAL, KERNEL_TILEGRID, CURRENT_TERMINAL, CURRENT_TILEGRID
-    term = newTerminal()
+    term, area = _make_console()
+
+    # Replace display root content with this terminal
+    if _display.root_group:
+        _display.root_group.pop(0)
+    _display.root_group.append(area)
+
     KERNEL_TERMINAL = term
-    KERNEL_TILEGRID = CURRENT_TILEGRID
+    KERNEL_TILEGRID = area
     CURRENT_TERMINAL = term
-    CURRENT_TILEGRID = KERNEL_TILEGRID
+    CURRENT_TILEGRID = area
 
 
 # --- Optimized Input Handler ------------------------------------------------
@@ -113,127 +485,193 @@ def input(prompt=""):
         _tw(prompt + visible)
 
     while True:
-        while supervisor.runtime.serial_bytes_available:
-            ch = sys.stdin.read(1)
-            code = ord(ch)
+        while _bus.wait(50):
+            k = _bus.get_key()
+            if k is None:
+                continue
+
+            # PAGE UP / PAGE DOWN review the scrollback
+            if k == "KEY_PGUP":
+                scrollback_page(1)
+                continue
+            if k == "KEY_PGDN":
+                scrollback_page(-1)
+                continue
+
+            # Any other key returns to the live screen
+            scrollback_exit()
+
+            # A paste fills the prompt up to its first newline, which submits
+            # it; the rest is read as the following input
+            if k == "KEY_PASTE":
+                text = _bus.paste.split("\n", 1)
+                buf[cursor:cursor] = list(text[0])
+                cursor += len(text[0])
+                if len(text) == 1:
+                    redraw()
+                    continue
+                if text[1]:
+                    _bus.unget(text[1], inputbus.EV_PASTE)
+                redraw()
+                k = "\n"
+
+            # F1..F4 switch virtual consoles
+            if k in _CONSOLE_KEYS:
+                chvt(_CONSOLE_KEYS.index(k))
+                redraw()
+            elif k == "KEY_LEFT":
+                if cursor > 0:
+                    cursor -= 1
+                    redraw()
+            elif k == "KEY_RIGHT":
+                if cursor < len(buf):
+                    cursor += 1
+                    redraw()
+            elif k == "KEY_UP":
+                if hist_index > 0:
+                    hist_index -= 1
+                    buf = list(_history[hist_index])
+                    cursor = len(buf)
+                    redraw()
+            elif k == "KEY_DOWN":
+                if hist_index < len(_history)-1:
+                    hist_index += 1
+                    buf = list(_history[hist_index])
+                else:
+                    hist_index = len(_history)
+                    buf = []
+                cursor = len(buf)
+                redraw()
+            elif len(k) != 1:
+                continue                # other named keys do nothing here
 
             # ENTER
-            if code in (10, 13):
+            elif k in ("\n", "\r"):
                 _tw("\n")
                 s = "".join(buf)
+                _sb_write(prompt + s + "\n")
                 if s:
                     _history.append(s)
                 _display.refresh()
                 return s
 
             # BACKSPACE
-            if code in (8, 127):
+            elif k in ("\x08", "\x7f"):
                 if cursor > 0:
                     cursor -= 1
                     buf.pop(cursor)
                     redraw()
-                continue
-
-            # ESC sequences
-            if code == 27:
-                nxt = sys.stdin.read(1)
-                if nxt == "[":
-                    tail = sys.stdin.read(1)
-
-                    if tail == "D" and cursor > 0:  # LEFT
-                        cursor -= 1
-                    elif tail == "C" and cursor < len(buf):  # RIGHT
-                        cursor += 1
-                    elif tail == "A" and hist_index > 0:  # UP
-                        hist_index -= 1
-                        buf = list(_history[hist_index])
-                        cursor = len(buf)
-                    elif tail == "B":  # DOWN
-                        if hist_index < len(_history)-1:
-                            hist_index += 1
-                            buf = list(_history[hist_index])
-                        else:
-                            hist_index = len(_history)
-                            buf = []
-                        cursor = len(buf)
-                    redraw()
-                continue
 
             # Printable characters
-            if 32 <= code <= 126 or code >= 160:
-                buf.insert(cursor, ch)
+            elif " " <= k <= "~" or k >= "\xa0":
+                buf.insert(cursor, k)
                 cursor += 1
                 redraw()
 
+        mirror_flush()
         _display.refresh()
 
 
 # --- SELECT MENU ------------------------------------------------------------
-def select(options, prompt="Select: "):
-    global CURRENT_TERMINAL, CURRENT_TILEGRID
+_select_vs = None
+
+def _select_screen():
+    """Fullscreen TileGrid + VScreen shared by every select() call."""
+    global _select_vs
+    if _select_vs is None:
+        area = displayio.TileGrid(
+            bitmap=FONT.bitmap,
+            width=SCR_W,
+            height=SCR_H,
+            tile_width=char_w,
+            tile_height=char_h,
+            pixel_shader=terminal_palette,
+        )
+        _select_vs = VScreen(area)
+    return _select_vs
 
-    n = len(options)
+def select(options, prompt="Select: "):
+    """
+    Pick one of options. Only the visible window is drawn; typing filters
+    the list (case-insensitive), Backspace widens it again, and
+    Up/Down/PgUp/PgDn/Home/End move the selection.
+    """
+    vs = _select_screen()
+    rows = SCR_H - 2                                # prompt + filter line
+    lower = [str(o).lower() for o in options]      # built once per call
+    matches = list(range(len(options)))
+    narrower = []                                   # matches before each typed char
+    query = ""
     index = 0
-
-    # Save old terminal + tilegrid
-    OLD_TERMINAL = CURRENT_TERMINAL
-    OLD_TILEGRID = CURRENT_TILEGRID
-
-    # Create temporary fullscreen terminal
-    newTerminal()
-
-    start_row = MAX_LINES - (n + 1)
-
-    poll = sel.poll()
-    poll.register(sys.stdin, sel.POLLIN)
-
-    def move(r, c):
-        _tw(f"\x1b[{r};{c}H")
+    top = 0
 
     def redraw():
-        move(start_row, 1)
-        _tw(prompt)
-        r = start_row + 1
-        for i, o in enumerate(options):
-            move(r, 1)
-            if i == index:
-                _tw(f"> {o}   ")
+        vs.put_line(0, prompt)
+        vs.put_line(1, f"/{query}  ({len(matches)}/{len(options)})")
+        for i in range(rows):
+            j = top + i
+            if j < len(matches):
+                mark = "> " if j == index else "  "
+                vs.put_line(i + 2, mark + str(options[matches[j]]))
             else:
-                _tw(f"  {o}   ")
-            r += 1
-
-    redraw()
-    _display.refresh()
-
-    # Menu loop
-    while True:
-        if not poll.poll(10):
-            continue
-
-        ch = sys.stdin.read(1)
-        if ch == "\x1b":   # ESC prefix
-            seq = sys.stdin.read(2)
-            if seq == "[A":  # UP
-                index = max(0, index - 1)
-                redraw()
-            elif seq == "[B":  # DOWN
-                index = min(n - 1, index + 1)
-                redraw()
-            _display.refresh()
-            continue
+                vs.put_line(i + 2, "")
+        vs.commit()
+        _display.refresh()
 
-        if ch in ("\n", "\r"):
-            # Restore old tilegrid
-            if _display.root_group:
-                _display.root_group.pop(0)
-            _display.root_group.append(OLD_TILEGRID)
+    root = _display.root_group
+    old = root[0]
+    root[0] = vs.tilegrid
+    try:
+        redraw()
+        while True:
+            if not _bus.wait(50):
+                continue
 
-            # Restore current terminal
-            CURRENT_TERMINAL = OLD_TERMINAL
-            CURRENT_TILEGRID = OLD_TILEGRID
+            k = _bus.get_key()
+            if k is None:
+                continue
+            last = len(matches) - 1
+            if k in ("\n", "\r"):
+                if matches:
+                    return options[matches[index]]
+                continue
+            if k == "KEY_UP":
+                index -= 1
+            elif k == "KEY_DOWN":
+                index += 1
+            elif k == "KEY_PGUP":
+                index -= rows
+            elif k == "KEY_PGDN":
+                index += rows
+            elif k == "KEY_HOME":
+                index = 0
+            elif k == "KEY_END":
+                index = last
+            elif k in ("\x08", "\x7f"):             # BACKSPACE widens the filter
+                if not query:
+                    continue
+                query = query[:-1]
+                matches = narrower.pop()
+                index = 0
+            elif len(k) == 1 and " " <= k:          # type-to-filter
+                query += k
+                narrower.append(matches)
+                q = query.lower()
+                # Each extra character can only narrow: rescan current hits.
+                matches = [i for i in matches if q in lower[i]]
+                index = 0
+            else:
+                continue
 
-            _display.refresh()
-            return options[index]
+            index = max(0, min(index, len(matches) - 1))
+            if index < top:
+                top = index
+            elif index >= top + rows:
+                top = index - rows + 1
+            redraw()
+    finally:
+        root[0] = old
+        _display.refresh()
 
 def cls():
     printf("\n" * (MAX_LINES - 1))
@@ -241,7 +679,6 @@ def cls():
 def pause():
     printf("Press any key to continue . . .")
     while True:
-        if supervisor.runtime.serial_bytes_available:
-            ch = sys.stdin.read(1)
+        if _bus.wait(100) and _bus.get_key() is not None:
             return
-        sleep(0.1)
\ No newline at end of file
+        mirror_flush()
\ No newline at end of file
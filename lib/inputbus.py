@@ -0,0 +1,288 @@
+"""
+One input loop for every input device.
+
+Serial, the USB HID keyboard and the USB boot mouse are polled together by
+InputBus.poll() and normalized into timestamped events held in a
+preallocated ring. The shell (helpers), the editors (dang.Screen) and
+panel.core.GUI all consume from the shared `bus`.
+"""
+import array
+import select
+import sys
+import time
+
+import supervisor
+from supervisor import ticks_ms
+
+import dang
+
+try:
+    import usb.core
+except ImportError:
+    usb = None
+
+EV_KEY = 1      # key: a character or a dang key name ("KEY_UP", ...)
+EV_PASTE = 2    # key: the pasted text
+EV_MOUSE = 3    # dx, dy, wheel, buttons
+
+QUEUE_SIZE = 64
+
+BUTTON_LEFT = 0x01
+BUTTON_RIGHT = 0x02
+BUTTON_MIDDLE = 0x04
+
+
+def ticks_diff(a, b):
+    return (a - b) & 0x1FFFFFFF
+
+
+class InputBus:
+    def __init__(self, size=QUEUE_SIZE):
+        self.size = size
+        self._kind = bytearray(size)
+        self._ts = array.array("L", [0] * size)
+        self._key = [None] * size
+        self._dx = array.array("h", [0] * size)
+        self._dy = array.array("h", [0] * size)
+        self._wheel = array.array("b", [0] * size)
+        self._buttons = bytearray(size)
+        self._head = 0
+        self._tail = 0
+        self.count = 0
+        self.dropped = 0
+        self.last_latency_ms = 0
+        self.paste = ""         # text of the last KEY_PASTE from get_key()
+
+        self.sources = []
+        self.hotplug = None     # USB registry, rescanned from poll() on its own cadence
+        self._serial_only = True
+        self._sel = select.poll()
+        self._sel.register(sys.stdin, select.POLLIN)
+
+    # --- producers -------------------------------------------------------
+    def add_source(self, source):
+        self.sources.append(source)
+        if not isinstance(source, SerialSource):
+            self._serial_only = False
+
+    def remove_source(self, source):
+        # A new list, so a poll() loop that is iterating the old one is unaffected
+        self.sources = [s for s in self.sources if s is not source]
+        self._serial_only = all(isinstance(s, SerialSource) for s in self.sources)
+
+    def _slot(self, kind, ts):
+        i = self._head
+        self._head = (i + 1) % self.size
+        if self.count == self.size:             # full: drop the oldest
+            self._tail = (self._tail + 1) % self.size
+            self.dropped += 1
+        else:
+            self.count += 1
+        self._kind[i] = kind
+        self._ts[i] = ts
+        return i
+
+    def push_key(self, key, ts, kind=EV_KEY):
+        i = self._slot(kind, ts)
+        self._key[i] = key
+
+    def push_mouse(self, dx, dy, wheel, buttons, ts):
+        i = self._slot(EV_MOUSE, ts)
+        self._key[i] = None
+        self._dx[i] = dx
+        self._dy[i] = dy
+        self._wheel[i] = wheel
+        self._buttons[i] = buttons
+
+    def poll(self):
+        """Poll every source once, and rescan USB if it is due."""
+        now = ticks_ms()
+        for source in self.sources:
+            source.poll(self, now)
+        if self.hotplug is not None:
+            self.hotplug.poll(self, now)
+
+    def wait(self, timeout_ms):
+        """
+        Poll until an event is queued or timeout_ms passes. With only serial
+        attached this sleeps in select until input, a held ESC going stale
+        or the next USB rescan; a USB device has to be polled.
+        """
+        start = ticks_ms()
+        while True:
+            self.poll()
+            if self.count:
+                return True
+            now = ticks_ms()
+            left = timeout_ms - ticks_diff(now, start)
+            if left <= 0:
+                return False
+            if self._serial_only:
+                for source in self.sources:
+                    if source.decoder.pending:
+                        left = min(left, dang.ESC_TIMEOUT_MS)
+                if self.hotplug is not None:
+                    left = min(left, self.hotplug.due_in(now))
+                self._sel.poll(left)
+            else:
+                time.sleep(0.001)   # USB reads carry their own short timeouts
+
+    # --- consumers -------------------------------------------------------
+    def _pop(self):
+        i = self._tail
+        self._tail = (i + 1) % self.size
+        self.count -= 1
+        self.last_latency_ms = ticks_diff(ticks_ms(), self._ts[i])
+        return i
+
+    def get(self):
+        """
+        Next event as (kind, ts, key, dx, dy, wheel, buttons), or None.
+        """
+        if not self.count:
+            return None
+        i = self._pop()
+        key = self._key[i]
+        self._key[i] = None
+        return (self._kind[i], self._ts[i], key,
+                self._dx[i], self._dy[i], self._wheel[i], self._buttons[i])
+
+    def get_key(self):
+        """
+        Next key, skipping mouse events. A paste comes back as "KEY_PASTE"
+        with its text left in `paste`.
+        """
+        while self.count:
+            i = self._pop()
+            kind = self._kind[i]
+            key = self._key[i]
+            self._key[i] = None
+            if kind == EV_KEY:
+                return key
+            if kind == EV_PASTE:
+                self.paste = key
+                return "KEY_PASTE"
+        return None
+
+    def unget(self, key, kind=EV_KEY):
+        """Put a key back at the front of the queue, to be read next."""
+        if self.count == self.size:             # full: drop the newest
+            self._head = (self._head - 1) % self.size
+            self.count -= 1
+            self.dropped += 1
+        i = self._tail = (self._tail - 1) % self.size
+        self.count += 1
+        self._kind[i] = kind
+        self._ts[i] = ticks_ms()
+        self._key[i] = key
+
+    def clear(self):
+        for i in range(self.size):
+            self._key[i] = None
+        self._head = self._tail = self.count = 0
+
+    def stats(self):
+        return {"queued": self.count, "dropped": self.dropped,
+                "latency_ms": self.last_latency_ms}
+
+
+class SerialSource:
+    """USB CDC / UART console, decoded by dang.KeyDecoder."""
+    def __init__(self):
+        self.decoder = dang.KeyDecoder()
+
+    def poll(self, bus, now):
+        dec = self.decoder
+        if supervisor.runtime.serial_bytes_available:
+            dec.feed(dang.read_serial(), now)
+        elif dec.pending:
+            dec.expire(now)
+        if dec.keys:
+            for k in dec.keys:
+                if k == "KEY_PASTE":
+                    bus.push_key(dec.pastes.pop(0), now, EV_PASTE)
+                else:
+                    bus.push_key(k, now)
+            dec.keys.clear()
+
+
+class MouseSource:
+    """USB boot-protocol mouse: [buttons, dx, dy, wheel] reports."""
+    def __init__(self, device, endpoint):
+        self.device = device
+        self.endpoint = endpoint
+        self.buf = array.array("b", [0] * 8)
+
+    def poll(self, bus, now):
+        try:
+            self.device.read(self.endpoint, self.buf, timeout=1)
+        except usb.core.USBTimeoutError:
+            return
+        except usb.core.USBError:
+            # Unplugged: stop reading it; the registry attaches it again if it is back
+            bus.remove_source(self)
+            _drop_device(self.device)
+            return
+        buf = self.buf
+        bus.push_mouse(buf[1], buf[2], buf[3], buf[0] & 0xFF, now)
+
+
+class KeyboardSource:
+    """USB boot keyboard, translated by the keyboard_handler driver."""
+    def __init__(self, driver):
+        self.driver = driver
+
+    def poll(self, bus, now):
+        for k in self.driver.poll(now):
+            bus.push_key(k, now)
+        if self.driver.keyboard is None:
+            bus.remove_source(self)     # unplugged; back on the next attach
+
+
+def set_paste_burst(burst):
+    """Let serial input take runs of burst plain chars as a paste (0: off)."""
+    for source in bus.sources:
+        if isinstance(source, SerialSource):
+            source.decoder.burst = burst
+
+
+def _drop_device(device):
+    try:
+        import usbregistry
+    except ImportError:
+        return
+    usbregistry.registry.drop(device)
+
+
+bus = InputBus()
+bus.add_source(SerialSource())
+
+
+def attach_keyboard():
+    """
+    Add USB hotplug scanning and the boot keyboard driver to the bus. The
+    driver picks a keyboard up whenever one is plugged in, and it is only
+    polled while one is attached.
+    """
+    try:
+        import usbregistry
+        import keyboard_handler
+    except ImportError:
+        return None
+    bus.hotplug = usbregistry.registry
+    source = KeyboardSource(keyboard_handler)
+
+    def attach(entry):
+        # keyboard_handler subscribed first, so it has claimed the device by now
+        if keyboard_handler.keyboard is not None and source not in bus.sources:
+            bus.add_source(source)
+
+    def detach(entry):
+        if keyboard_handler.keyboard is None:
+            bus.remove_source(source)
+
+    usbregistry.registry.subscribe(usbregistry.BOOT_KEYBOARD, attach, detach)
+    return source
+
+
+attach_keyboard()
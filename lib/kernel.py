@@ -24,8 +24,19 @@ def exit_program(code=0, message=""):
 ns = {"print": helpers.print, "input": helpers.input
       , "printf": helpers.printf, "exit": exit_program}
 
+# What every program starts with; each run gets its own copy of this
+_BASE = dict(ns)
+
 PATH = ["sd/bin", "bin"]
 
+def sandbox(**names):
+    """Fresh program namespace, so code run from elsewhere (the editor's ^R)
+    neither sees nor leaves behind another program's globals."""
+    env = dict(_BASE)
+    env["__name__"] = "__main__"
+    env.update(names)
+    return env
+
 def findProgram(program, cwd):
     """Find command in cwd or PATH."""
     for ext in (".py", ".mpy"):
@@ -46,40 +57,39 @@ def runProgram(program):
         with open(progPath, "r") as f:
             data = f.read()
         # refactor when sd card works
+        prev_console = helpers.active_console
         helpers.terminal = helpers.newTerminal()
+        env = dict(_BASE)
         try: 
-            exec(data, ns)
-            ns.get("main", lambda *_: None)
+            exec(data, env)
+            env.get("main", lambda *_: None)
         except ProgramExit as e:
             return f"Program exited with code {e.code}: {e.message}"
         except KeyboardInterrupt:
             pass
         finally:
-            helpers.CURRENT_TERMINAL = helpers.KERNEL_TERMINAL
-            helpers.CURRENT_TILEGRID = helpers.KERNEL_TILEGRID
-            helpers.display.root_group.pop(0)
-            helpers.display.root_group.append(helpers.KERNEL_TILEGRID)
+            helpers.chvt(prev_console)
     elif fsio.exists(progPathWindowed, root=True):
         with open(progPathWindowed, "r") as f:
             data = f.read()
         # set up windowed group
 
         progGroup = displayio.Group()
-        term = helpers.display.root_group.pop(0)
-        helpers.display.root_group.append(progGroup)
+        prev_console = helpers.active_console
+        helpers.display.root_group[0] = progGroup
         helpers.display.refresh()
 
-        ns.update({"group": progGroup, "refresh": helpers.display.refresh})
+        env = dict(_BASE)
+        env.update({"group": progGroup, "refresh": helpers.display.refresh})
         try: 
-            exec(data, ns)
-            ns.get("main", lambda *_: None)
+            exec(data, env)
+            env.get("main", lambda *_: None)
         except ProgramExit as e:
             return f"Program exited with code {e.code}: {e.message}"
         except KeyboardInterrupt:
             pass
         finally:
-            helpers.display.root_group.pop(0)
-            helpers.display.root_group.append(helpers.KERNEL_TILEGRID)
+            helpers.chvt(prev_console)
     else:
         raise CommandNotFoundError(f"Program '{program}' not found.")
 
@@ -88,8 +98,9 @@ def exe(program, args, cwd):
     progPath = findProgram(program, cwd)
     if progPath:
         try:
-            exec(progPath.read(), ns)
-            out = ns.get("main", lambda *_: None)(args, cwd)
+            env = dict(_BASE)
+            exec(progPath.read(), env)
+            out = env.get("main", lambda *_: None)(args, cwd)
             if out:
                 return out
         except ProgramExit as e:
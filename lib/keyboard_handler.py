@@ -4,123 +4,102 @@
 import array
 
 import usb
-import adafruit_usb_host_descriptors
+from supervisor import ticks_ms
+import usbregistry
 
 #interface index, and endpoint addresses for USB Device instance
 kbd_interface_index = None
 kbd_endpoint_address = None
 keyboard = None
 
-# scan for connected USB devices
-for device in usb.core.find(find_all=True):
-    # check for boot keyboard endpoints on this device
-    kbd_interface_index, kbd_endpoint_address = (
-        adafruit_usb_host_descriptors.find_boot_keyboard_endpoint(device)
-    )
-    # if a boot keyboard interface index and endpoint address were found
-    if kbd_interface_index is not None and kbd_interface_index is not None:
-        keyboard = device
 
-        # detach device from kernel if needed
-        if keyboard.is_kernel_driver_active(0):
-            keyboard.detach_kernel_driver(0)
+def _attach(entry):
+    global keyboard, kbd_interface_index, kbd_endpoint_address
+    if keyboard is not None:
+        return                          # first keyboard wins
+    entry.claim()
+    kbd_interface_index = entry.interface(usbregistry.BOOT_KEYBOARD)
+    kbd_endpoint_address = entry.endpoints(usbregistry.BOOT_KEYBOARD)[0]
+    keyboard = entry.device
 
-        # set the configuration so it can be used
-        keyboard.set_configuration()
 
-if keyboard is None:
-    raise RuntimeError("No boot keyboard endpoint found")
+def _detach(entry):
+    _detach_device(entry.device)
+
+
+def _detach_device(device):
+    global keyboard, _repeat_code, _repeat_key
+    if device is keyboard and device is not None:
+        keyboard = None
+        _prev[:] = bytes(8)
+        _held.clear()
+        _repeat_code = 0
+        _repeat_key = None
+
 
 buf = array.array("b", [0] * 8)
 
+# --- Lookup tables ------------------------------------------------------------
+# Built once at import. The two layers are indexed by HID usage code; a zero
+# byte means the code has no character (it may still be in NAMED_KEYS).
+PLAIN = b"\0\0\0\0abcdefghijklmnopqrstuvwxyz1234567890\n\x1b\x7f\t -=[]\\\0;'`,./"
+SHIFTED = b"\0\0\0\0ABCDEFGHIJKLMNOPQRSTUVWXYZ!@#$%^&*()\n\x1b\x7f\t _+{}|\0:\"~<>?"
+
+# Non-character keys, named the same way dang.KeyDecoder names them
+NAMED_KEYS = {
+    0x49: "KEY_INSERT",
+    0x4A: "KEY_HOME",
+    0x4B: "KEY_PGUP",
+    0x4C: "KEY_DELETE",
+    0x4D: "KEY_END",
+    0x4E: "KEY_PGDN",
+    0x4F: "KEY_RIGHT",
+    0x50: "KEY_LEFT",
+    0x51: "KEY_DOWN",
+    0x52: "KEY_UP",
+}
+for _i in range(12):
+    NAMED_KEYS[0x3A + _i] = f"KEY_F{_i + 1}"
+
+CAPS_LOCK = 0x39
+
+MODIFIERS = (
+    (0x01, "LEFT_CTRL"),
+    (0x02, "LEFT_SHIFT"),
+    (0x04, "LEFT_ALT"),
+    (0x08, "LEFT_GUI"),
+    (0x10, "RIGHT_CTRL"),
+    (0x20, "RIGHT_SHIFT"),
+    (0x40, "RIGHT_ALT"),
+    (0x80, "RIGHT_GUI"),
+)
+MOD_CTRL = 0x11
+MOD_SHIFT = 0x22
+
+# Usage code -> name, for print_keyboard_report()
+KEY_NAMES = {
+    0x28: "ENTER", 0x29: "ESC", 0x2A: "BACKSPACE", 0x2B: "TAB", 0x2C: "SPACE",
+    0x2D: "MINUS", 0x2E: "EQUAL", 0x2F: "LBRACKET", 0x30: "RBRACKET",
+    0x31: "BACKSLASH", 0x33: "SEMICOLON", 0x34: "QUOTE", 0x35: "GRAVE",
+    0x36: "COMMA", 0x37: "PERIOD", 0x38: "SLASH", 0x39: "CAPS_LOCK",
+    0x4F: "RIGHT_ARROW", 0x50: "LEFT_ARROW", 0x51: "DOWN_ARROW", 0x52: "UP_ARROW",
+}
+for _i in range(0x04, 0x28):
+    KEY_NAMES[_i] = chr(SHIFTED[_i]) if _i <= 0x1D else chr(PLAIN[_i])
+for _i in range(12):
+    KEY_NAMES[0x3A + _i] = f"F{_i + 1}"
 
-def print_keyboard_report(report_data):
-    # Dictionary for modifier keys (first byte)
-    modifier_dict = {
-        0x01: "LEFT_CTRL",
-        0x02: "LEFT_SHIFT",
-        0x04: "LEFT_ALT",
-        0x08: "LEFT_GUI",
-        0x10: "RIGHT_CTRL",
-        0x20: "RIGHT_SHIFT",
-        0x40: "RIGHT_ALT",
-        0x80: "RIGHT_GUI",
-    }
-
-    # Dictionary for key codes (main keys)
-    key_dict = {
-        0x04: "A",
-        0x05: "B",
-        0x06: "C",
-        0x07: "D",
-        0x08: "E",
-        0x09: "F",
-        0x0A: "G",
-        0x0B: "H",
-        0x0C: "I",
-        0x0D: "J",
-        0x0E: "K",
-        0x0F: "L",
-        0x10: "M",
-        0x11: "N",
-        0x12: "O",
-        0x13: "P",
-        0x14: "Q",
-        0x15: "R",
-        0x16: "S",
-        0x17: "T",
-        0x18: "U",
-        0x19: "V",
-        0x1A: "W",
-        0x1B: "X",
-        0x1C: "Y",
-        0x1D: "Z",
-        0x1E: "1",
-        0x1F: "2",
-        0x20: "3",
-        0x21: "4",
-        0x22: "5",
-        0x23: "6",
-        0x24: "7",
-        0x25: "8",
-        0x26: "9",
-        0x27: "0",
-        0x28: "ENTER",
-        0x29: "ESC",
-        0x2A: "BACKSPACE",
-        0x2B: "TAB",
-        0x2C: "SPACE",
-        0x2D: "MINUS",
-        0x2E: "EQUAL",
-        0x2F: "LBRACKET",
-        0x30: "RBRACKET",
-        0x31: "BACKSLASH",
-        0x33: "SEMICOLON",
-        0x34: "QUOTE",
-        0x35: "GRAVE",
-        0x36: "COMMA",
-        0x37: "PERIOD",
-        0x38: "SLASH",
-        0x39: "CAPS_LOCK",
-        0x4F: "RIGHT_ARROW",
-        0x50: "LEFT_ARROW",
-        0x51: "DOWN_ARROW",
-        0x52: "UP_ARROW",
-    }
-
-    # Add F1-F12 keys to the dictionary
-    for i in range(12):
-        key_dict[0x3A + i] = f"F{i + 1}"
 
+def print_keyboard_report(report_data):
     # First byte contains modifier keys
-    modifiers = report_data[0]
+    modifiers = report_data[0] & 0xFF
 
     # Print modifier keys if pressed
     if modifiers > 0:
         print("Modifiers:", end=" ")
 
         # Check each bit for modifiers and print if pressed
-        for bit, name in modifier_dict.items():
+        for bit, name in MODIFIERS:
             if modifiers & bit:
                 print(name, end=" ")
 
@@ -130,7 +109,7 @@ def print_keyboard_report(report_data):
     keys_pressed = False
 
     for i in range(2, 8):
-        key = report_data[i]
+        key = report_data[i] & 0xFF
 
         # Skip if no key or error rollover
         if key in {0, 1}:
@@ -141,8 +120,8 @@ def print_keyboard_report(report_data):
             keys_pressed = True
 
         # Print key name based on dictionary lookup
-        if key in key_dict:
-            print(key_dict[key], end=" ")
+        if key in KEY_NAMES:
+            print(KEY_NAMES[key], end=" ")
         else:
             # For keys not in the dictionary, print the HID code
             print(f"0x{key:02X}", end=" ")
@@ -153,12 +132,110 @@ def print_keyboard_report(report_data):
         print("No keys pressed")
 
 
-def read_kb():
+# --- Driver -----------------------------------------------------------------
+READ_TIMEOUT_MS = 1         # keep the shared input loop responsive
+REPEAT_DELAY_MS = 500       # hold time before a key starts repeating
+REPEAT_RATE_MS = 33         # interval between repeats (~30 per second)
+
+caps_lock = False
+released = []              # keys released during the last poll()
+
+_prev = bytearray(8)        # previous report (modifiers, reserved, 6 codes)
+_held = {}                  # usage code -> key it produced when pressed
+_repeat_code = 0
+_repeat_key = None
+_repeat_at = 0
+
+
+def set_repeat(delay_ms=REPEAT_DELAY_MS, rate_ms=REPEAT_RATE_MS):
+    """Configure software key repeat; a delay of 0 turns it off."""
+    global REPEAT_DELAY_MS, REPEAT_RATE_MS, _repeat_key
+    REPEAT_DELAY_MS = delay_ms
+    REPEAT_RATE_MS = max(1, rate_ms)
+    if not delay_ms:
+        _repeat_key = None
+
+
+def translate(code, modifiers):
+    """Key for one usage code under the given modifier byte, or None."""
+    if code in NAMED_KEYS:
+        return NAMED_KEYS[code]
+    if code >= len(PLAIN) or not PLAIN[code]:
+        return None
+    if modifiers & MOD_CTRL and 0x04 <= code <= 0x1D:
+        return chr(code - 3)            # Ctrl-A = "\x01" ... Ctrl-Z = "\x1a"
+    shift = bool(modifiers & MOD_SHIFT)
+    if caps_lock and 0x04 <= code <= 0x1D:
+        shift = not shift
+    return chr((SHIFTED if shift else PLAIN)[code])
+
+
+def _ticks_due(now, at):
+    return ((now - at) & 0x1FFFFFFF) < 0x10000000
+
+
+def _report(report, now, keys):
+    """Diff one report against the previous one."""
+    global caps_lock, _repeat_code, _repeat_key, _repeat_at
+    if report[2] & 0xFF == 0x01:
+        return                          # phantom state (rollover error): ignore
+    cur = bytes(b & 0xFF for b in report)
+    old = _prev[2:]
+    for i in range(2, 8):               # releases
+        code = old[i - 2]
+        if code and code not in cur[2:]:
+            key = _held.pop(code, None)
+            if key is not None:
+                released.append(key)
+            if code == _repeat_code:
+                _repeat_code = 0
+                _repeat_key = None
+    for i in range(2, 8):               # presses
+        code = cur[i]
+        if code < 4 or code in old:
+            continue
+        if code == CAPS_LOCK:
+            caps_lock = not caps_lock
+            continue
+        key = translate(code, cur[0])
+        if key is None:
+            continue
+        keys.append(key)
+        _held[code] = key
+        if REPEAT_DELAY_MS:
+            _repeat_code = code
+            _repeat_key = key
+            _repeat_at = (now + REPEAT_DELAY_MS) & 0x1FFFFFFF
+    _prev[:] = cur
+
+
+def poll(now=None):
+    """
+    Keys pressed since the last call, plus any due repeat of the held key.
+    Releases are left in `released`. This is the inputbus source API.
+    """
+    global _repeat_at
+    if now is None:
+        now = ticks_ms()
+    keys = []
+    released.clear()
+    if keyboard is None:
+        return keys
     try:
-        count = keyboard.read(kbd_endpoint_address, buf, timeout=10)
-        #print_keyboard_report(buf)
-
-    # if there is no data it will raise USBTimeoutError
+        keyboard.read(kbd_endpoint_address, buf, timeout=READ_TIMEOUT_MS)
+        _report(buf, now, keys)
     except usb.core.USBTimeoutError:
-        # Nothing to do if there is no data for this keyboard
-        pass
\ No newline at end of file
+        pass
+    except usb.core.USBError:
+        # Unplugged: detach it; the registry attaches it again if it is back
+        device = keyboard
+        _detach_device(device)
+        usbregistry.registry.drop(device)
+    if _repeat_key is not None and not keys and _ticks_due(now, _repeat_at):
+        keys.append(_repeat_key)
+        _repeat_at = (now + REPEAT_RATE_MS) & 0x1FFFFFFF
+    return keys
+
+
+# Keyboards plugged in now or later are picked up through the registry
+usbregistry.registry.subscribe(usbregistry.BOOT_KEYBOARD, _attach, _detach)
@@ -4,19 +4,113 @@ from adafruit_display_shapes.rect import Rect
 from adafruit_display_shapes.circle import Circle
 from adafruit_bitmap_font import bitmap_font
 import vectorio
-import adafruit_usb_host_descriptors
-import usb.core
-import array
 import adafruit_imageload
-import supervisor
-import sys
-import time
+from supervisor import ticks_ms
+import inputbus
+import usbregistry
+from inputbus import ticks_diff
 
 font_file = "sd/dev/cp437-6x8a.pcf"
 
 font = bitmap_font.load_font(font_file)
 font.load_glyphs(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789!@#$%^&*()-_=+[]{};:'\",.<>/?\\|`~ ")
 
+TARGET_FPS = 30
+FRAME_BUDGET_MS = 20    # input handled per update() before the rest waits a frame
+
+TICK_MS = 16            # timer wheel resolution; a power of two so ticks wrap cleanly
+WHEEL_SLOTS = 64        # one turn of the wheel is about a second
+IDLE_WAIT_MS = 1000     # longest idle() waits for input with nothing scheduled
+
+GRID_CELL = 32          # side of a hit-testing grid square, in pixels
+
+_TICKS_MASK = 0x1FFFFFFF
+_TICKS_HALF = 0x10000000
+
+
+def _ticks_until(due, now):
+    """Signed ms from now to due (negative once it has passed)."""
+    return ((due - now + _TICKS_HALF) & _TICKS_MASK) - _TICKS_HALF
+
+
+class Timer:
+    """Handle returned by GUI.after(), every() and animate()."""
+    def __init__(self, due, period, callback):
+        self.due = due
+        self.period = period    # 0 for a one-shot timer
+        self.callback = callback
+        self.active = True
+
+    def cancel(self):
+        self.active = False     # dropped from the wheel when its slot comes up
+
+
+class SpatialGrid:
+    """
+    Uniform grid of rectangles for point hit-testing. Each item is listed in
+    every GRID_CELL square its rect touches, so hit() only checks the few
+    items under the point. Later inserts sit above earlier ones.
+    """
+    def __init__(self, cell=GRID_CELL):
+        self.cell = cell
+        self._cells = {}        # square key -> items touching it
+        self._rects = {}        # item -> [x, y, w, h, z]
+        self._z = 0
+
+    def _keys(self, x, y, w, h):
+        c = self.cell
+        for cy in range(y // c, (y + h - 1) // c + 1):
+            for cx in range(x // c, (x + w - 1) // c + 1):
+                yield cy * 1024 + cx
+
+    def _add(self, item, rect):
+        self._rects[item] = rect
+        cells = self._cells
+        for key in self._keys(rect[0], rect[1], rect[2], rect[3]):
+            if key in cells:
+                cells[key].append(item)
+            else:
+                cells[key] = [item]
+
+    def insert(self, item, x, y, w, h):
+        """Add item on top of everything already indexed."""
+        self.remove(item)
+        self._z += 1
+        self._add(item, [x, y, w, h, self._z])
+
+    def remove(self, item):
+        rect = self._rects.pop(item, None)
+        if rect is None:
+            return
+        cells = self._cells
+        for key in self._keys(rect[0], rect[1], rect[2], rect[3]):
+            cell = cells[key]
+            cell.remove(item)
+            if not cell:
+                del cells[key]
+
+    def move(self, item, x, y, w, h):
+        """Update item's rect, keeping its place in the stacking order."""
+        rect = self._rects.get(item)
+        if rect is None:
+            self.insert(item, x, y, w, h)
+        elif rect[0] != x or rect[1] != y or rect[2] != w or rect[3] != h:
+            self.remove(item)
+            self._add(item, [x, y, w, h, rect[4]])
+
+    def hit(self, x, y):
+        """The topmost item whose rect holds (x, y), or None."""
+        c = self.cell
+        best = None
+        top = 0
+        for item in self._cells.get((y // c) * 1024 + x // c, ()):
+            rx, ry, rw, rh, z = self._rects[item]
+            if z > top and rx <= x < rx + rw and ry <= y < ry + rh:
+                best = item
+                top = z
+        return best
+
+
 GUI = None
 
 class GUI:
@@ -32,12 +126,11 @@ class GUI:
         self.display.root_group = self.guiroot
         self.display.auto_refresh = False
 
-        # Key buffer (simple FIFO). Bounded to avoid runaway memory use.
-        self._key_buffer = []
         # store provided input source (can be a callable or None)
         self.input_source = input
 
         self.windows = []
+        self.index = SpatialGrid()      # visible windows, by screen rect
         self.cursor = Cursor()
         self.guiroot.append(self.cursor.group)
         self.drawBackground()
@@ -46,29 +139,177 @@ class GUI:
         self.currentDesktopIconX = 10
         self.currentDesktopIconY = 10
 
-        # Add a time source and a timestamp for when the time label was last updated.
-        # Use monotonic() if available to avoid issues with system clock changes.
-        self._now = time.monotonic if hasattr(time, "monotonic") else time.time
-        self._last_time_update = self._now()
-
         self.focus = None  # Currently focused window or widget
         self.focused_widget = None
 
-        self._key_buffer = bytearray(256)   # small fixed ring buffer
-        self._kb_head = 0
-        self._kb_tail = 0
-        self._read_buf = bytearray(64)      # bulk read buffer
-        
+        # Keyboard, serial and mouse all arrive through the shared input bus
+        self.bus = inputbus.bus
+
+        # Frame scheduler: components call invalidate() after changing the
+        # scene, and frame() refreshes at most once per frame_ms, only if dirty
+        self.dirty = True
+        self.frame_ms = 1000 // TARGET_FPS
+        self.refresh_ms = 0         # how long the last refresh took
+        self._last_frame = ticks_ms() - self.frame_ms
+
+        # Timer wheel: slot (due // TICK_MS) % WHEEL_SLOTS holds each timer
+        self._wheel = [[] for _ in range(WHEEL_SLOTS)]
+        self._tick = ticks_ms() // TICK_MS
+
+        # USB hotplug is rescanned on a timer rather than by the bus, so
+        # idle() sleeps until the next timer when only serial is attached
+        self.bus.hotplug = None
+        self.every(usbregistry.HOTPLUG_MS, usbregistry.registry.scan)
+
+        # Redraw time/date in title bar, once a minute:
+        #def tick_clock():
+        #    t = time.localtime()
+        #    self.timeLabel.text = f"{t[3]:02}:{t[4]:02} {t[2]:02}/{t[1]:02}/{t[0]%100:02}"
+        #    self.invalidate()
+        #self.every(60000, tick_clock)
+
         GUI = self
 
+        self.frame()
+
+    def invalidate(self):
+        """Mark the scene changed; the next frame() refreshes the display."""
+        self.dirty = True
+
+    def set_fps(self, fps):
+        self.frame_ms = 1000 // fps
+
+    def frame(self):
+        """
+        Refresh the display if the scene is dirty and a frame interval has
+        passed since the last refresh. Returns True if it refreshed.
+        """
+        if not self.dirty or ticks_diff(ticks_ms(), self._last_frame) < self.frame_ms:
+            return False
+        self.dirty = False
+        start = ticks_ms()
         self.display.refresh()
+        self._last_frame = start
+        self.refresh_ms = ticks_diff(ticks_ms(), start)
+        return True
+
+    def focusWidget(self, widget):
+        """Move keyboard focus to widget (or None), telling both sides."""
+        old = self.focused_widget
+        if old is widget:
+            return
+        self.focused_widget = widget
+        if old is not None and hasattr(old, 'on_blur'):
+            old.on_blur()
+        if widget is not None and hasattr(widget, 'on_focus'):
+            widget.on_focus()
+
+    # --- Timers -------------------------------------------------------------
+    def _schedule(self, timer):
+        self._wheel[(timer.due // TICK_MS) % WHEEL_SLOTS].append(timer)
+
+    def after(self, ms, callback):
+        """Call callback() once, ms from now."""
+        timer = Timer((ticks_ms() + ms) & _TICKS_MASK, 0, callback)
+        self._schedule(timer)
+        return timer
+
+    def every(self, ms, callback):
+        """Call callback() every ms until the returned Timer is cancelled."""
+        ms = max(int(ms), 1)
+        timer = Timer((ticks_ms() + ms) & _TICKS_MASK, ms, callback)
+        self._schedule(timer)
+        return timer
+
+    def animate(self, obj, attr, to, ms, ease=None, done=None):
+        """
+        Tween the number obj.attr to `to` over ms, one step per frame.
+        ease maps 0..1 progress to 0..1 (linear if None); done() runs at the end.
+        """
+        start = getattr(obj, attr)
+        began = ticks_ms()
+        whole = isinstance(start, int) and isinstance(to, int)
+
+        def step():
+            t = min(ticks_diff(ticks_ms(), began) / ms, 1) if ms > 0 else 1
+            value = start + (to - start) * (ease(t) if ease else t)
+            setattr(obj, attr, round(value) if whole else value)
+            self.invalidate()
+            if t >= 1:
+                timer.cancel()
+                if done:
+                    done()
+
+        timer = self.every(self.frame_ms, step)
+        return timer
+
+    def run_timers(self):
+        """Fire every timer that is due."""
+        now = ticks_ms()
+        tick = now // TICK_MS
+        # Visit the slots of the ticks since the last run (all, after a long stall)
+        steps = min((tick - self._tick) & (_TICKS_MASK // TICK_MS), WHEEL_SLOTS - 1)
+        due = []
+        for i in range(steps + 1):
+            slot = self._wheel[(self._tick + i) % WHEEL_SLOTS]
+            if not slot:
+                continue
+            keep = []
+            for timer in slot:
+                if timer.active:
+                    (due if _ticks_until(timer.due, now) <= 0 else keep).append(timer)
+            slot[:] = keep
+        self._tick = tick
+        for timer in due:
+            if not timer.active:
+                continue
+            if timer.period:
+                timer.due = (timer.due + timer.period) & _TICKS_MASK
+                if _ticks_until(timer.due, now) <= 0:     # fell behind: don't catch up
+                    timer.due = (now + timer.period) & _TICKS_MASK
+                self._schedule(timer)
+            else:
+                timer.active = False
+            timer.callback()
+
+    def next_timer_ms(self):
+        """Milliseconds until the next timer is due (0 if overdue), or None."""
+        now = ticks_ms()
+        best = None
+        for i in range(WHEEL_SLOTS):
+            for timer in self._wheel[(self._tick + i) % WHEEL_SLOTS]:
+                if timer.active:
+                    left = _ticks_until(timer.due, now)
+                    if best is None or left < best:
+                        best = left
+            # later slots only hold timers due after this slot ends
+            if best is not None and best < (i + 1) * TICK_MS - now % TICK_MS:
+                break
+        return None if best is None else max(best, 0)
+
+    def idle(self):
+        """Sleep until input arrives, a timer is due or a pending frame can be drawn."""
+        wait = self.next_timer_ms()
+        if wait is None:
+            wait = IDLE_WAIT_MS
+        if self.dirty:
+            wait = min(wait, self.frame_ms - ticks_diff(ticks_ms(), self._last_frame))
+        if wait > 0 and not self.bus.count:
+            self.bus.wait(wait)
+
+    def run(self):
+        """Main loop: handle input and timers, draw, then sleep until there is more."""
+        while True:
+            self.update()
+            self.idle()
 
     def addWindow(self, window):
         self.windows.append(window)
+        self.index.insert(window, window.x, window.y, window.width, window.height)
         self.guiroot.append(window.group)
         self.guiroot.append(self.guiroot.pop(0))  # Ensure cursor is on top
         self.focus = window
-        self.display.refresh()
+        self.invalidate()
 
     def addIcon(self, icon):
         # Draw desktop icon
@@ -109,7 +350,7 @@ class GUI:
         # Display group
         self.guiroot.append(tile_grid)
 
-        self.display.refresh()
+        self.invalidate()
 
     def fillAllColorsFast(self):
         bitmap = displayio.Bitmap(self.display.width, self.display.height, 256)
@@ -130,99 +371,50 @@ class GUI:
 
 
     def update(self):
-        cursorRead = self.cursor.update()
-        btn = cursorRead[0]
-        if btn:
-            if btn == "left":
-                # Check windows in reverse order (topmost first)
-                for window in reversed(self.windows):
-                    # get the tip of the cursor
-                    cursor_tip_y = self.cursor.y - 4
-                    cursor_tip_x = self.cursor.x - 4
-                    if window.inBounds(cursor_tip_x, cursor_tip_y):
-                        self.focus = window
-                        window.processClick(cursor_tip_x, cursor_tip_y)
-                        break  # Stop after closing one window
-        elif cursorRead[1]:
+        self.run_timers()
+
+        # Drain what was queued since the last frame in arrival order, up to
+        # the frame budget; anything left is handled next frame
+        bus = self.bus
+        bus.poll()
+        keys = ""
+        start = ticks_ms()
+        while bus.count and ticks_diff(ticks_ms(), start) < FRAME_BUDGET_MS:
+            kind, ts, key, dx, dy, wheel, buttons = bus.get()
+            if kind == inputbus.EV_MOUSE:
+                self.mouseEvent(dx, dy, wheel, buttons)
+            elif kind == inputbus.EV_PASTE or len(key) == 1:
+                keys += key
+
+        if keys and self.focused_widget and hasattr(self.focused_widget, 'on_key'):
+            self.focused_widget.on_key(keys)
+            self.invalidate()
+
+        self.frame()
+
+    def mouseEvent(self, dx, dy, wheel, buttons):
+        cursor = self.cursor
+        if dx or dy:
+            cursor.move(int(dx * cursor.speedMultiplier), int(dy * cursor.speedMultiplier))
+        # Clicks fire once, on the press edge
+        pressed = buttons & ~cursor.buttons
+        cursor.buttons = buttons
+        if pressed & inputbus.BUTTON_LEFT:
+            # get the tip of the cursor
+            cursor_tip_x = cursor.x - 4
+            cursor_tip_y = cursor.y - 4
+            window = self.index.hit(cursor_tip_x, cursor_tip_y)     # topmost
+            if window:
+                self.focus = window
+                window.processClick(cursor_tip_x, cursor_tip_y)
+                self.invalidate()
+        elif wheel:
             # scroll wheel event (1 or -1)
-            scroll_direction = cursorRead[1]
-            for window in reversed(self.windows):
-                if window.inBounds(self.cursor.x, self.cursor.y):
-                    if self.focused_widget and hasattr(self.focused_widget, 'on_scroll'):
-                        if callable(self.focused_widget.on_scroll):
-                            self.focused_widget.on_scroll(scroll_direction)
-        # Poll input early and aggressively
-
-        # Drain and dispatch all buffered keys immediately to reduce perceived latency
-        # Streamlined keyboard dispatch
-        self.poll_keypresses()
-
-        if self.focused_widget and hasattr(self.focused_widget, 'on_key'):
-            keys = self.drain_keys()
-            if keys:
-                self.focused_widget.on_key(keys)
-
-        # Redraw time/date in title bar
-        # Efficient: only update every 60 seconds.
-        #now = self._now()
-        #if (now - self._last_time_update) >= 60:
-        #    t = time.localtime()
-        #    timestr = f"{t[3]:02}:{t[4]:02} {t[2]:02}/{t[1]:02}/{t[0]%100:02}"
-        #    self.timeLabel.text = timestr
-        #    self._last_time_update = now
-
-        self.display.refresh()
-
-    # New: keyboard buffer helpers
-    def _kb_push(self, c):
-        """Push one byte into the ring buffer, dropping oldest if full."""
-        nxt = (self._kb_head + 1) % len(self._key_buffer)
-        if nxt == self._kb_tail:  # buffer full, drop oldest
-            self._kb_tail = (self._kb_tail + 1) % len(self._key_buffer)
-        self._key_buffer[self._kb_head] = c
-        self._kb_head = nxt
-
-    def _kb_pop(self):
-        """Pop one byte from ring buffer, or return None."""
-        if self._kb_head == self._kb_tail:
-            return None
-        c = self._key_buffer[self._kb_tail]
-        self._kb_tail = (self._kb_tail + 1) % len(self._key_buffer)
-        return c
-
-    def _kb_available(self):
-        """Number of bytes available."""
-        if self._kb_head >= self._kb_tail:
-            return self._kb_head - self._kb_tail
-        return len(self._key_buffer) - (self._kb_tail - self._kb_head)
-
-    def poll_keypresses(self):
-        """
-        High-performance nonblocking serial poll.
-        Reads in chunks into a preallocated buffer.
-        """
-        avail = supervisor.runtime.serial_bytes_available
-        if not avail:
-            return
-        n = min(avail, len(self._read_buf))
-        # read directly into buffer to minimize Python overhead
-        data = sys.stdin.read(n)
-        if not data:
-            return
-        for ch in data:
-            self._kb_push(ord(ch) if isinstance(ch, str) else ch)
-
-    def drain_keys(self):
-        """Return all currently buffered keys as a single string."""
-        if self._kb_head == self._kb_tail:
-            return ""
-        if self._kb_head > self._kb_tail:
-            data = self._key_buffer[self._kb_tail:self._kb_head]
-        else:
-            data = self._key_buffer[self._kb_tail:] + self._key_buffer[:self._kb_head]
-        self._kb_tail = self._kb_head
-        return bytes(data).decode()
-    
+            if self.index.hit(cursor.x, cursor.y):
+                if self.focused_widget and hasattr(self.focused_widget, 'on_scroll'):
+                    if callable(self.focused_widget.on_scroll):
+                        self.focused_widget.on_scroll(wheel)
+                        self.invalidate()
 
 
 class Window:
@@ -239,7 +431,7 @@ class Window:
         self.width = width
         self.height = height
         self.title = title
-        self.group = displayio.Group()
+        self.group = displayio.Group(x=x, y=y)     # everything inside is window-local
         self.drawWindow()
 
         self.isMaximized = False
@@ -250,34 +442,35 @@ class Window:
         self.windowedy = y
 
         self.widgets = []
+        self.widget_index = SpatialGrid()   # widgets, by window-local rect
 
         GUI.addWindow(self)
 
 
     def drawWindow(self):
         # Background
-        self.group.append(Rect(self.x, self.y, self.width, self.height, fill=0x00000))
+        self.group.append(Rect(0, 0, self.width, self.height, fill=0x00000))
         # Title bar
-        self.group.append(Rect(self.x+1, self.y+1, self.width - 2, 10, fill=0xFFFFFF))
+        self.group.append(Rect(1, 1, self.width - 2, 10, fill=0xFFFFFF))
         # Content area
-        self.group.append(Rect(self.x+1, self.y + 12, self.width-2, self.height-13, fill=0xFFFFFF))
+        self.group.append(Rect(1, 12, self.width-2, self.height-13, fill=0xFFFFFF))
 
         # Title text
 
-        text = label.Label(font, text=self.title, color=0x000000, x=self.x, y=self.y+7)
-        text.x = ((self.width - text.bounding_box[2]) // 2) + self.x
+        text = label.Label(font, text=self.title, color=0x000000, x=0, y=7)
+        text.x = (self.width - text.bounding_box[2]) // 2
 
         self.group.append(text)
 
         # Traffic light buttons
 
-        self.group.append(Circle(self.x + 6, self.y + 6, 2, fill=0xFF605C))  # Close button
-        self.group.append(Circle(self.x + 14, self.y + 6, 2, fill=0xFFBD44)) # Minimize button
-        self.group.append(Circle(self.x + 22, self.y + 6, 2, fill=0x00CA56)) # Maximize button
+        self.group.append(Circle(6, 6, 2, fill=0xFF605C))  # Close button
+        self.group.append(Circle(14, 6, 2, fill=0xFFBD44)) # Minimize button
+        self.group.append(Circle(22, 6, 2, fill=0x00CA56)) # Maximize button
 
         # Application specific content
 
-        #text = label.Label(font, text="Hi mom", color=0x000000, x=self.x + 3, y=self.y+18)
+        #text = label.Label(font, text="Hi mom", color=0x000000, x=3, y=18)
 
         #self.group.append(text)
 
@@ -285,11 +478,21 @@ class Window:
         widget.parent_window = self
         #widget.attach()
         self.widgets.append(widget)
+        self.widget_index.insert(widget, widget.local_x, widget.local_y, widget.width, widget.height)
+
+    def removeWidget(self, widget):
+        if widget in self.widgets:
+            self.widgets.remove(widget)
+        self.widget_index.remove(widget)
+
+    def placeWidget(self, widget):
+        """Re-index a widget after its rel_x/rel_y or size changed."""
+        self.widget_index.move(widget, widget.local_x, widget.local_y, widget.width, widget.height)
 
     def translate(self, dx, dy):
         """
-        Moves the window by (dx, dy) pixels.
-        Automatically updates internal position and refreshes the display.
+        Moves the window by (dx, dy) pixels. Its contents are window-local,
+        so only the window's group moves.
         """
 
         # New target position
@@ -305,17 +508,11 @@ class Window:
         ):
             return  # Ignore movement if it would move window offscreen
 
-        # Move all child layers within the window group
-        for item in self.group:
-            item.x += dx
-            item.y += dy
+        self.x = self.group.x = new_x
+        self.y = self.group.y = new_y
+        GUI.index.move(self, self.x, self.y, self.width, self.height)
 
-        # Update stored position
-        self.x = new_x
-        self.y = new_y
-
-        # Refresh display
-        GUI.display.refresh()
+        GUI.invalidate()
 
     def inBounds(self, x, y):
         return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
@@ -326,15 +523,20 @@ class Window:
         # Process traffic light buttons
         if (self.x + 4) <= x <= (self.x + 8) and (self.y + 4) <= y <= (self.y + 8):
             # Close button clicked
+            for widget in list(self.widgets):
+                if hasattr(widget, 'destroy'):
+                    widget.destroy()    # stops their timers and drops focus
             GUI.guiroot.remove(self.group)
             GUI.windows.remove(self)
-            GUI.display.refresh()
+            GUI.index.remove(self)
+            GUI.invalidate()
             return "closed"
         elif (self.x + 12) <= x <= (self.x + 16) and (self.y + 4) <= y <= (self.y + 8):
             # Minimize button clicked
             # For simplicity, just hide the window
             self.group.hidden = True
-            GUI.display.refresh()
+            GUI.index.remove(self)      # hidden windows take no clicks
+            GUI.invalidate()
             return "minimized"
         elif (self.x + 20) <= x <= (self.x + 24) and (self.y + 4) <= y <= (self.y + 8):
             # Maximize button clicked
@@ -365,7 +567,8 @@ class Window:
                 self.group[3].x = (self.width - self.group[3].bounding_box[2]) // 2
                 self.translate(self.windowedx, self.windowedy)
                 self.isMaximized = False
-            GUI.display.refresh()
+            GUI.index.move(self, self.x, self.y, self.width, self.height)
+            GUI.invalidate()
             GUI.cursor.group.hidden = False
             return "maximized"
 
@@ -380,14 +583,18 @@ class Window:
             # Create a frame rectangle to show the drag outline
             frame = Rect(frame_x, frame_y, self.width, self.height, outline=0xFFFFFF)
             GUI.guiroot.append(frame)
-            GUI.display.refresh()
+            GUI.invalidate()
 
+            bus = GUI.bus
             while True:
-                m = GUI.cursor.readUSB()
-                if m:
-                    dx = int(m[0] * GUI.cursor.speedMultiplier)
-                    dy = int(m[1] * GUI.cursor.speedMultiplier)
-                    
+                GUI.frame()     # the outline follows at the frame rate
+                if not bus.wait(20):
+                    continue
+                kind, ts, key, mx, my, wheel, buttons = bus.get()
+                if kind == inputbus.EV_MOUSE:   # keys typed mid-drag are dropped
+                    dx = int(mx * GUI.cursor.speedMultiplier)
+                    dy = int(my * GUI.cursor.speedMultiplier)
+
                     if dx != 0 or dy != 0:
                         # Update cursor position
                         GUI.cursor.x += dx
@@ -409,27 +616,30 @@ class Window:
                         GUI.cursor.draw()
 
                     # Check if left mouse button is released
-                    if m[2] != "left":
+                    GUI.cursor.buttons = buttons
+                    if not buttons & inputbus.BUTTON_LEFT:
                         break
 
             # Finalize window position
             self.translate(frame_x - self.x, frame_y - self.y)
 
             GUI.guiroot.remove(frame)
-            GUI.display.refresh()
+            GUI.invalidate()
             return "moved"
         
-        # Process widgets if any
-        for item in self.widgets:
-            if item.inBounds(x, y):
-                self.focused_widget = item
-                GUI.focused_widget = item
-                if hasattr(item, 'on_click'):
-                    if callable(item.on_click):
-                        item.on_click(x, y)
-                return
+        # Process widgets if any, in window-local coordinates
+        x -= self.x
+        y -= self.y
+        item = self.widget_index.hit(x, y)
+        if item:
+            self.focused_widget = item
+            GUI.focusWidget(item)
+            if hasattr(item, 'on_click'):
+                if callable(item.on_click):
+                    item.on_click(x, y)
+            return
         self.focused_widget = None
-        GUI.focused_widget = None
+        GUI.focusWidget(None)
 
 class Cursor:
     def __init__(self, x=320, y=240):
@@ -439,36 +649,27 @@ class Cursor:
 
         self.speedMultiplier = 1
 
-        self.BUTTONS = ["left", "right", "middle"]
-
-        self.buf = array.array("b", [0] * 8)
-
-        # scan for connected USB device and loop over any found
-        for device in usb.core.find(find_all=True):
-            # print device info
-            print(f"{device.idVendor:04x}:{device.idProduct:04x}")
-            print(device.manufacturer, device.product)
-            print(device.serial_number)
-
-            # try to find mouse endpoint on the current device.
-            mouse_interface_index, mouse_endpoint_address = (
-                adafruit_usb_host_descriptors.find_boot_mouse_endpoint(device)
-            )
-            if mouse_interface_index is not None and mouse_endpoint_address is not None:
-                self.mouse = device
-                print(
-                    f"mouse interface: {mouse_interface_index} "
-                    + f"endpoint_address: {hex(mouse_endpoint_address)}"
-                )
+        self.buttons = 0        # inputbus.BUTTON_* bits held at the last report
+        self.source = None
 
-                # detach the kernel driver if needed
-                if self.mouse.is_kernel_driver_active(0):
-                    self.mouse.detach_kernel_driver(0)
+        # the registry calls back now for a mouse that is already plugged
+        # in, and later for one that is hotplugged
+        usbregistry.registry.subscribe(usbregistry.BOOT_MOUSE, self.attachMouse, self.detachMouse)
 
-                # set configuration on the mouse so we can use it
-                self.mouse.set_configuration()
-
-                break
+    def attachMouse(self, entry):
+        if self.source is not None:
+            return
+        entry.claim()
+        self.mouse = entry.device
+        # reports are read by the input bus alongside the keyboard
+        self.source = inputbus.MouseSource(self.mouse, entry.endpoints(usbregistry.BOOT_MOUSE)[0])
+        inputbus.bus.add_source(self.source)
+
+    def detachMouse(self, entry):
+        if self.source is not None and self.source.device is entry.device:
+            inputbus.bus.remove_source(self.source)
+            self.source = None
+            self.buttons = 0
 
     def move(self, dx, dy):
         self.x += dx
@@ -523,43 +724,8 @@ class Cursor:
         self.outline.y = int(self.y)
         self.fill.x = int(self.x)
         self.fill.y = int(self.y)
-        GUI.display.refresh()
-
-    def readUSB(self):
-        """Mouse event handler."""
-        try:
-            # attempt to read data from the mouse
-            # 20ms timeout, so we don't block long if there
-            # is no data
-            self.mouse.read(0x82, self.buf, timeout=1)
-        except usb.core.USBTimeoutError:
-            # skip the rest of the loop if there is no data
-            return
+        GUI.invalidate()
 
-        # string with delta x, y values to print
-
-        # loop over the button names
-        btn = None
-        for i, button in enumerate(self.BUTTONS):
-            # check if each button is pressed using bitwise AND shifted
-            # to the appropriate index for this button
-            if self.buf[0] & (1 << i) != 0:
-                # append the button name to the string to show if
-                # it is being clicked.
-                btn = button
-
-        return self.buf[1], self.buf[2], self.buf[3], btn
-
-    def update(self):
-        m = self.readUSB()
-        if m:
-            self.move(int(m[0] * self.speedMultiplier), int(m[1] * self.speedMultiplier))
-            if m[3]:
-                return m[3], None
-            elif m[2]:
-                return None, m[2]
-        return None, None
-            
 class LayoutManager:
     def __init__(self, parent_window):
         self.parent_window = parent_window
@@ -6,8 +6,8 @@ font = panel.core.font
 class Widget:
     """
     Base class for all UI widgets.
-    Widgets use relative (window-local) coordinates.
-    The GUI automatically recalculates display positions when windows move or resize.
+    Widgets use relative (window-local) coordinates and sit in their window's
+    group, so they move with it. Clicks arrive in window-local coordinates.
     """
     def __init__(self, rel_x, rel_y, width, height, parent_window=None):
         self.rel_x = rel_x
@@ -19,6 +19,19 @@ class Widget:
         if parent_window:
             parent_window.addWidget(self)
 
+    @property
+    def local_x(self):
+        """Position inside the parent window's group (below its title bar)."""
+        if not self.parent_window:
+            return self.rel_x
+        return 1 + self.rel_x
+
+    @property
+    def local_y(self):
+        if not self.parent_window:
+            return self.rel_y
+        return 12 + self.rel_y  # Offset for title bar
+
     @property
     def abs_x(self):
         if not self.parent_window:
@@ -40,15 +53,21 @@ class Widget:
         self.group.append(widget.group)
 
     def update_position(self):
-        self.group.x = self.abs_x
-        self.group.y = self.abs_y
+        self.group.x = self.local_x
+        self.group.y = self.local_y
+        if self.parent_window:
+            self.parent_window.placeWidget(self)
 
     def inBounds(self, x, y):
-        return self.abs_x <= x < self.abs_x + self.width and self.abs_y <= y < self.abs_y + self.height
+        return self.local_x <= x < self.local_x + self.width and self.local_y <= y < self.local_y + self.height
 
     def draw(self):
         raise NotImplementedError
 
     def destroy(self):
-        if self.parent_window and self.group in self.parent_window.group:
-            self.parent_window.group.remove(self.group)
+        if panel.core.GUI.focused_widget is self:
+            panel.core.GUI.focusWidget(None)
+        if self.parent_window:
+            self.parent_window.removeWidget(self)
+            if self.group in self.parent_window.group:
+                self.parent_window.group.remove(self.group)
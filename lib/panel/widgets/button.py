@@ -1,4 +1,3 @@
-import time
 from adafruit_display_text import label
 from adafruit_display_shapes.rect import Rect
 import panel.core
@@ -13,7 +12,7 @@ class Button(Widget):
         self.draw()
 
     def draw(self):
-        self.group = displayio.Group(x=self.abs_x, y=self.abs_y)
+        self.group = displayio.Group(x=self.local_x, y=self.local_y)
         rect = Rect(0, 0, self.width, self.height, outline=0x000000, fill=0xFFFFFF)
         text_label = label.Label(font, text=self._text, color=0x000000)
         text_label.x = (self.width - text_label.bounding_box[2]) // 2
@@ -24,8 +23,12 @@ class Button(Widget):
 
     def on_click(self, x, y):
         if self.inBounds(x, y):
+            gui = panel.core.GUI
             self.group[0].fill = 0xCCCCCC
-            panel.core.GUI.display.refresh()
+            gui.invalidate()
             self.usr_on_click()
-            time.sleep(0.1)
-            self.group[0].fill = 0xFFFFFF
+            gui.after(100, self._release)
+
+    def _release(self):
+        self.group[0].fill = 0xFFFFFF
+        panel.core.GUI.invalidate()
@@ -15,8 +15,8 @@ class Label(Widget):
         text_label.x = 0
         text_label.y = self.height // 2
         self.group.append(text_label)
-        self.group.x = self.abs_x
-        self.group.y = self.abs_y
+        self.group.x = self.local_x
+        self.group.y = self.local_y
 
     @property
     def text(self):
@@ -21,8 +21,8 @@ class ListBox(Widget):
             item_label.y = 8 + i * 10
             self.labels.append(item_label)
             self.group.append(item_label)
-        self.group.x = self.abs_x
-        self.group.y = self.abs_y
+        self.group.x = self.local_x
+        self.group.y = self.local_y
 
     def select(self, index):
         if 0 <= index < len(self.items):
@@ -37,6 +37,6 @@ class ListBox(Widget):
 
     def on_click(self, x, y):
         if self.inBounds(x, y):
-            relative_y = y - self.abs_y
+            relative_y = y - self.local_y
             index = relative_y // 10
             self.select(index)
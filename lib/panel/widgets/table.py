@@ -14,15 +14,20 @@ class Table(Widget):
         self.labels = {}
         super().__init__(rel_x, rel_y, width, height, parent_window)
         self.draw()
-        self.attach()
-        panel.core.GUI.focused_widget = self  # Auto-focus on creation
+        panel.core.GUI.focusWidget(self)  # Auto-focus on creation
 
     def draw(self):
-        # Clear any existing graphics
-        self.group = displayio.Group()
+        # Clear any existing graphics; the new group takes the old one's place
+        old = self.group
+        self.group = displayio.Group(x=self.local_x, y=self.local_y)
+        window = self.parent_window
+        if window and old in window.group:
+            window.group[window.group.index(old)] = self.group
+        else:
+            self.attach()
 
         # Box with table of data
-        box = Rect(self.abs_x, self.abs_y, self.width, self.height, outline=0x000000, fill=0xFFFFFF)
+        box = Rect(0, 0, self.width, self.height, outline=0x000000, fill=0xFFFFFF)
         self.group.append(box)
 
         col_width = self.width // len(self.columns)
@@ -30,12 +35,12 @@ class Table(Widget):
         # Draw headers
         for i, col in enumerate(self.columns):
             col_label = label.Label(font, text=str(col), color=0x000000)
-            col_label.x = self.abs_x + (i * col_width + 2)
-            col_label.y = self.abs_y + 8
+            col_label.x = i * col_width + 2
+            col_label.y = 8
             self.group.append(col_label)
 
         # Header separator line
-        line = Line(self.abs_x + 2, self.abs_y + 14, self.abs_x + self.width - 4, self.abs_y + 14, color=0x000000)
+        line = Line(2, 14, self.width - 4, 14, color=0x000000)
         self.group.append(line)
 
         # Determine how many rows fit
@@ -56,16 +61,16 @@ class Table(Widget):
                     else 0x000000
                 )
                 cell_label = label.Label(font, text=str(cell), color=color)
-                cell_label.x = self.abs_x + (col_index * col_width + 2)
-                cell_label.y = self.abs_y + 22 + (row_index * 10)
+                cell_label.x = col_index * col_width + 2
+                cell_label.y = 22 + (row_index * 10)
                 self.group.append(cell_label)
                 self.labels[row_index].append(cell_label)
 
         # Scrollbar size based on total rows
         scrollWheelLength = min(self.height, (self.num_visible / max(len(self.data), 1)) * (self.height - 16))
         self.scrollRect = Rect(
-            (self.abs_x + self.width) - 6,
-            self.abs_y,
+            self.width - 6,
+            0,
             6,
             int(scrollWheelLength),
             outline=0x000000,
@@ -94,9 +99,9 @@ class Table(Widget):
 
     def on_click(self, x, y):
         if self.inBounds(x, y):
-            if x >= self.abs_x + (self.width - 8):  # scrollbar click
+            if x >= self.local_x + (self.width - 8):  # scrollbar click
                 return
-            relative_y = y - self.abs_y - 16
+            relative_y = y - self.local_y - 16
             index = relative_y // 10
             actual_index = self.scroll_offset + index
             self.select(actual_index)
@@ -120,14 +125,14 @@ class Table(Widget):
         # Update scrollbar position
         scroll_range = max(len(self.data) - self.num_visible, 0)
         if scroll_range > 0:
-            self.scrollRect.y = self.abs_y + int(
+            self.scrollRect.y = int(
                 (self.scroll_offset / scroll_range) * (self.height - self.scrollRect.height)
             )
         else:
-            self.scrollRect.y = self.abs_y
+            self.scrollRect.y = 0
 
         # Update highlighting based on selection visibility
-        if not (self.scroll_offset <= self.selected_index < self.scroll_offset + self.num_visible):
+        if self.selected_index is None or not (self.scroll_offset <= self.selected_index < self.scroll_offset + self.num_visible):
             # Selected row scrolled out of view — deselect visually but keep the index
             for lbls in self.labels.values():
                 for lbl in lbls:
@@ -1,7 +1,6 @@
 import displayio
 from adafruit_display_text import label
 from adafruit_display_shapes.rect import Rect
-import time
 import panel.core
 
 font = panel.core.font
@@ -24,8 +23,6 @@ class TextBox:
         self.parent_window = parent_window
         self.text = text
         self.cursor_visible = True
-        self.last_blink_time = time.monotonic()
-        self.last_refresh_time = 0
         self.textLineCutoff = width // 6
 
         # Create main group and background box
@@ -48,10 +45,22 @@ class TextBox:
             self.attach()
 
         self.update_cursor_position()
-        self.last_text_update = 0
-        panel.core.GUI.focused_widget = self  # Auto-focus on creation
+        self.blink_timer = None     # runs only while focused
+        panel.core.GUI.focusWidget(self)  # Auto-focus on creation
 
     # --- Coordinates ---
+    @property
+    def local_x(self):
+        if not self.parent_window:
+            return self.rel_x
+        return 1 + self.rel_x
+
+    @property
+    def local_y(self):
+        if not self.parent_window:
+            return self.rel_y
+        return 12 + self.rel_y  # Offset for title bar
+
     @property
     def abs_x(self):
         if not self.parent_window:
@@ -69,11 +78,13 @@ class TextBox:
             self.parent_window.group.append(self.group)
 
     def update_position(self):
-        self.group.x = self.abs_x
-        self.group.y = self.abs_y
+        self.group.x = self.local_x
+        self.group.y = self.local_y
+        if self.parent_window:
+            self.parent_window.placeWidget(self)
 
     def inBounds(self, x, y):
-        return self.abs_x <= x < self.abs_x + self.width and self.abs_y <= y < self.abs_y + self.height
+        return self.local_x <= x < self.local_x + self.width and self.local_y <= y < self.local_y + self.height
 
     # --- Input Handling ---
     def on_key(self, ch):
@@ -99,6 +110,7 @@ class TextBox:
             if changed:
                 self.label.text = self.text
                 self.update_cursor_position()
+                panel.core.GUI.invalidate()
 
     # --- Cursor ---
     def update_cursor_position(self):
@@ -111,17 +123,41 @@ class TextBox:
         self.cursor.x = cursor_x
         self.cursor.y = cursor_y
 
+    def _blink(self):
+        self.cursor_visible = not self.cursor_visible
+        self.cursor.hidden = not self.cursor_visible
+        panel.core.GUI.invalidate()
+
+    def on_focus(self):
+        if self.blink_timer is None:
+            self.blink_timer = panel.core.GUI.every(self.CURSOR_BLINK_INTERVAL * 1000, self._blink)
+        self.cursor_visible = True
+        self.cursor.hidden = False
+        panel.core.GUI.invalidate()
+
+    def on_blur(self):
+        if self.blink_timer is not None:
+            self.blink_timer.cancel()
+            self.blink_timer = None
+        self.cursor_visible = False
+        self.cursor.hidden = True
+        panel.core.GUI.invalidate()
+
     def update(self):
-        """Blink cursor asynchronously (no full refresh)."""
-        now = time.monotonic()
-        if now - self.last_blink_time >= self.CURSOR_BLINK_INTERVAL:
-            self.cursor_visible = not self.cursor_visible
-            self.cursor.hidden = not self.cursor_visible
-            self.last_blink_time = now
-            # Only refresh cursor area (fast)
-            panel.core.GUI.display.refresh(minimum_frames_per_second=0)
+        """Nothing to do: the cursor blinks on a GUI timer while focused."""
 
     def draw(self):
-        self.group.x = self.abs_x
-        self.group.y = self.abs_y
+        self.group.x = self.local_x
+        self.group.y = self.local_y
         self.group.hidden = False
+
+    def destroy(self):
+        if panel.core.GUI.focused_widget is self:
+            panel.core.GUI.focusWidget(None)
+        if self.blink_timer is not None:
+            self.blink_timer.cancel()
+            self.blink_timer = None
+        if self.parent_window:
+            self.parent_window.removeWidget(self)
+            if self.group in self.parent_window.group:
+                self.parent_window.group.remove(self.group)
@@ -17,5 +17,5 @@ class TextView(Widget):
         self.label.x = 0
         self.label.y = self.rel_y + 8
         self.group.append(self.label)
-        self.group.x = self.abs_x
-        self.group.y = self.abs_y
+        self.group.x = self.local_x
+        self.group.y = self.local_y
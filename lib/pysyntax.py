@@ -0,0 +1,140 @@
+"""
+Line-at-a-time Python lexer for editor syntax highlighting.
+
+lex_line() colours one line given the lexer state at its start (normal, or
+inside a triple-quoted string) and returns the state at its end. Highlighter
+caches those end states per row, so after an edit only the rows from the
+edit down to where the state converges again are re-lexed.
+"""
+NORMAL = 0
+IN_TRIPLE_SINGLE = 1     # inside '''...
+IN_TRIPLE_DOUBLE = 2     # inside """...
+
+PLAIN = 0
+KEYWORD = 1
+STRING = 2
+COMMENT = 3
+NUMBER = 4
+
+KEYWORDS = {
+    "False", "None", "True", "and", "as", "assert", "async", "await",
+    "break", "class", "continue", "def", "del", "elif", "else", "except",
+    "finally", "for", "from", "global", "if", "import", "in", "is",
+    "lambda", "nonlocal", "not", "or", "pass", "raise", "return", "try",
+    "while", "with", "yield",
+}
+
+_TRIPLES = ("", "'''", '"""')
+
+
+def _ident(c):
+    return c.isalpha() or c == "_" or c.isdigit()
+
+
+def lex_line(line, state=NORMAL):
+    """Return ([(start, end, kind), ...], end_state) for one line."""
+    spans = []
+    n = len(line)
+    i = 0
+    if state:
+        close = line.find(_TRIPLES[state])
+        if close == -1:
+            if n:
+                spans.append((0, n, STRING))
+            return spans, state
+        i = close + 3
+        spans.append((0, i, STRING))
+    while i < n:
+        c = line[i]
+        if c == "#":
+            spans.append((i, n, COMMENT))
+            return spans, NORMAL
+        if c == "'" or c == '"':
+            if line[i:i + 3] == c * 3:
+                close = line.find(c * 3, i + 3)
+                if close == -1:
+                    spans.append((i, n, STRING))
+                    return spans, IN_TRIPLE_SINGLE if c == "'" else IN_TRIPLE_DOUBLE
+                spans.append((i, close + 3, STRING))
+                i = close + 3
+                continue
+            j = i + 1
+            while j < n and line[j] != c:
+                j += 2 if line[j] == "\\" else 1
+            j = min(j + 1, n)
+            spans.append((i, j, STRING))
+            i = j
+        elif c.isdigit() or (c == "." and i + 1 < n and line[i + 1].isdigit()):
+            j = i + 1
+            while j < n and (_ident(line[j]) or line[j] == "."):
+                j += 1
+            spans.append((i, j, NUMBER))
+            i = j
+        elif c.isalpha() or c == "_":
+            j = i + 1
+            while j < n and _ident(line[j]):
+                j += 1
+            if line[i:j] in KEYWORDS:
+                spans.append((i, j, KEYWORD))
+            i = j
+        else:
+            i += 1
+    return spans, NORMAL
+
+
+class Highlighter:
+    """
+    Per-row lexer end states for a buffer with line(row) and line_count().
+    Rows are lexed lazily, only as far down as has been asked for.
+    """
+    def __init__(self):
+        self.states = bytearray()   # end state of each row lexed so far
+        self.valid = 0              # states[:valid] are up to date
+        self._check_from = 0        # rows before this were edited: no early stop
+        self.restyled = None        # (first, last) rows whose start state changed
+
+    def edit(self, row, delta=0):
+        """Row was edited and delta lines were inserted (or removed) after it."""
+        states = self.states
+        if row >= len(states):
+            return                      # not lexed that far yet
+        # Keep the old end state of the edited text on its last row
+        if delta > 0:
+            states[row:row] = bytes(delta)
+        elif delta < 0:
+            states[row:row - delta] = b""
+        check = self._check_from
+        if check > row:
+            check += delta
+        # Rows from valid on were lexed from a start state that may since have
+        # changed, so an unchanged end state only proves convergence past them
+        if self.valid < len(states) - delta:
+            check = max(check, self.valid + delta if self.valid > row else self.valid)
+        # ... and past the edited rows
+        self._check_from = max(check, row + max(delta, 0))
+        self.valid = min(self.valid, row)
+
+    def start_state(self, buf, row):
+        """Lexer state at the start of row, lexing the rows above as needed."""
+        states = self.states
+        r = self.valid
+        while r < row:
+            state = lex_line(buf.line(r), states[r - 1] if r else NORMAL)[1]
+            if r < len(states):
+                old = states[r]
+                states[r] = state
+                if old == state and r >= self._check_from:
+                    r = len(states)     # converged: the rest still holds
+                    self._check_from = 0
+                    continue
+                if old != state:
+                    first, last = self.restyled or (r + 1, r + 1)
+                    self.restyled = (min(first, r + 1), max(last, r + 1))
+            else:
+                states.append(state)
+            r += 1
+        self.valid = max(self.valid, min(r, len(states)))
+        return states[row - 1] if row else NORMAL
+
+    def spans(self, buf, row):
+        return lex_line(buf.line(row), self.start_state(buf, row))[0]
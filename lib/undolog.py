@@ -0,0 +1,124 @@
+"""
+Operation log for editor undo/redo.
+
+Each edit is recorded as an insert or delete of `text` at (row, col),
+packed into one preallocated bytearray as an 11-byte header followed by the
+UTF-8 text. Consecutive keystrokes on a line coalesce into one record
+(typing breaks at each new word), so undo removes a word or a run of
+backspaces at once. When the budget is
+full the oldest records are dropped first.
+"""
+import struct
+
+INSERT = 1
+DELETE = 2
+
+BUDGET = 4096           # bytes of history per editor
+COALESCE_MAX = 64       # longest run merged into one record
+
+_HEADER = "<BIIH"       # kind, row, col, text length in bytes
+_HEADER_LEN = struct.calcsize(_HEADER)
+
+
+class UndoLog:
+    def __init__(self, budget=BUDGET):
+        self._data = bytearray(budget)
+        self._end = 0
+        self._starts = []       # offset of each record, oldest first
+        self._redo = []         # (kind, row, col, text) undone, newest last
+        self._sealed = True
+
+    def __len__(self):
+        return len(self._starts)
+
+    def seal(self):
+        """Stop the next edit from merging into the previous one (cursor moved)."""
+        self._sealed = True
+
+    def clear(self):
+        self._end = 0
+        self._starts = []
+        self._redo = []
+        self._sealed = True
+
+    def _read(self, i):
+        start = self._starts[i]
+        kind, row, col, n = struct.unpack_from(_HEADER, self._data, start)
+        body = start + _HEADER_LEN
+        return kind, row, col, str(self._data[body:body + n], "utf-8")
+
+    def _evict(self, need):
+        """Drop the oldest records until need bytes are free."""
+        starts = self._starts
+        k = 0
+        while k < len(starts) and len(self._data) - (self._end - self._cut(k)) < need:
+            k += 1
+        cut = self._cut(k)
+        if cut:
+            data = self._data
+            data[0:self._end - cut] = data[cut:self._end]
+            self._end -= cut
+            self._starts = [s - cut for s in starts[k:]]
+
+    def _cut(self, k):
+        return self._starts[k] if k < len(self._starts) else self._end
+
+    def _append(self, kind, row, col, text):
+        body = text.encode()
+        need = _HEADER_LEN + len(body)
+        if need > len(self._data) or len(body) > 0xFFFF:
+            self.clear()            # too big to keep: history ends here
+            return
+        if len(self._data) - self._end < need:
+            self._evict(need)
+        start = self._end
+        struct.pack_into(_HEADER, self._data, start, kind, row, col, len(body))
+        self._data[start + _HEADER_LEN:start + need] = body
+        self._starts.append(start)
+        self._end = start + need
+
+    def _pop(self):
+        op = self._read(-1)
+        self._end = self._starts.pop()
+        return op
+
+    def record(self, kind, row, col, text):
+        self._redo = []
+        if not self._sealed and self._starts and "\n" not in text:
+            k, r, c, t = self._read(-1)
+            if k == kind and r == row and "\n" not in t and len(t) < COALESCE_MAX:
+                if kind == INSERT and c + len(t) == col and not (t[-1:] == " " != text):
+                    self._pop()
+                    text, col = t + text, c
+                elif kind == DELETE and col + len(text) == c:      # backspace
+                    self._pop()
+                    text = text + t
+                elif kind == DELETE and col == c:                   # forward delete
+                    self._pop()
+                    text = t + text
+        self._append(kind, row, col, text)
+        self._sealed = "\n" in text
+
+    def insert(self, row, col, text):
+        self.record(INSERT, row, col, text)
+
+    def delete(self, row, col, text):
+        self.record(DELETE, row, col, text)
+
+    def undo(self):
+        """The last edit as (kind, row, col, text), to be reversed; or None."""
+        if not self._starts:
+            return None
+        op = self._pop()
+        self._redo.append(op)
+        self._sealed = True
+        return op
+
+    def redo(self):
+        """The last undone edit as (kind, row, col, text), to be reapplied; or None."""
+        if not self._redo:
+            return None
+        op = self._redo.pop()
+        self._append(*op)
+        self._sealed = True
+        return op
@@ -0,0 +1,201 @@
+"""
+USB device registry.
+
+The bus is enumerated once and each device's interface summary is cached
+under (vid, pid, serial). Later scans only compare the cheap (vid, pid,
+bus, port) identity of what is plugged in, so descriptors are fetched
+again only for devices that are new. Drivers subscribe by class and are
+called as matching devices come and go:
+
+    usbregistry.registry.subscribe(usbregistry.BOOT_MOUSE, on_attach, on_detach)
+
+The input bus calls poll() from the loop that reads the keyboard and
+mouse, and sleeps no longer than due_in() when nothing else needs polling;
+panel.core.GUI rescans from a timer instead.
+"""
+import adafruit_usb_host_descriptors as descriptors
+from supervisor import ticks_ms
+
+try:
+    import usb.core
+except ImportError:
+    usb = None
+
+BOOT_MOUSE = "boot_mouse"
+BOOT_KEYBOARD = "boot_keyboard"
+MASS_STORAGE = "mass_storage"
+
+HOTPLUG_MS = 1000       # minimum time between rescans from poll()
+
+
+def ticks_diff(a, b):
+    return (a - b) & 0x1FFFFFFF
+
+
+class USBEntry:
+    """One plugged-in device and what it offers, keyed by `key`."""
+    def __init__(self, device, key):
+        self.device = device
+        self.key = key                  # (vid, pid, serial)
+        self.classes = {}               # class name -> (interface, endpoints)
+        self.interfaces = []            # parse_configuration() result
+        self.claimed = False
+        self._describe()
+
+    def _describe(self):
+        # One descriptor fetch and walk; the find_* helpers are lookups on it
+        device = self.device
+        self.interfaces = interfaces = descriptors.parse_configuration(device)
+        interface, endpoint = descriptors.find_boot_mouse_endpoint(device, interfaces)
+        if endpoint is not None:
+            self.classes[BOOT_MOUSE] = (interface, (endpoint,))
+        interface, endpoint = descriptors.find_boot_keyboard_endpoint(device, interfaces)
+        if endpoint is not None:
+            self.classes[BOOT_KEYBOARD] = (interface, (endpoint,))
+        interface, bulk_in, bulk_out = descriptors.find_mass_storage_endpoints(device, interfaces)
+        if interface is not None:
+            self.classes[MASS_STORAGE] = (interface, (bulk_in, bulk_out))
+
+    def interface(self, cls):
+        return self.classes[cls][0]
+
+    def endpoints(self, cls):
+        return self.classes[cls][1]
+
+    def claim(self):
+        """Detach the kernel driver and configure the device (once)."""
+        if not self.claimed:
+            if self.device.is_kernel_driver_active(0):
+                self.device.detach_kernel_driver(0)
+            self.device.set_configuration()
+            self.claimed = True
+
+    def __repr__(self):
+        vid, pid, serial = self.key
+        return f"<USB {vid:04x}:{pid:04x} {serial} {sorted(self.classes)}>"
+
+
+def _port_id(device):
+    return (device.idVendor, device.idProduct,
+            getattr(device, "bus", None), tuple(getattr(device, "port_numbers", None) or ()))
+
+
+class Registry:
+    def __init__(self):
+        self.devices = {}       # (vid, pid, serial) -> USBEntry
+        self._ports = {}        # port identity -> (vid, pid, serial)
+        self._subs = {}         # class name -> [(on_attach, on_detach)]
+        self._scanned = False
+        self._last_scan = 0
+
+    def scan(self):
+        """Enumerate the bus; attach new devices and drop unplugged ones."""
+        self._scanned = True
+        self._last_scan = ticks_ms()
+        if usb is None:
+            return
+        seen = {}
+        for device in usb.core.find(find_all=True):
+            port = _port_id(device)
+            key = self._ports.get(port)
+            if key is None or key not in self.devices:
+                try:
+                    key = (device.idVendor, device.idProduct, device.serial_number)
+                    entry = USBEntry(device, key)
+                    self.devices[key] = entry
+                    self._notify(entry, 0)
+                except usb.core.USBError:
+                    # still enumerating, or unplugged mid-attach; retry next scan
+                    self.drop(device)
+                    continue
+            seen[port] = key
+        gone = set(self._ports.values()) - set(seen.values())
+        self._ports = seen
+        for key in gone:
+            entry = self.devices.pop(key, None)
+            if entry is not None:
+                self._notify(entry, 1)
+
+    def _notify(self, entry, which):
+        for cls in entry.classes:
+            for callbacks in self._subs.get(cls, ()):
+                if callbacks[which] is None:
+                    continue
+                if which:
+                    try:
+                        callbacks[which](entry)
+                    except usb.core.USBError:
+                        pass            # the device is gone either way
+                else:
+                    callbacks[which](entry)
+
+    def drop(self, device):
+        """
+        Forget device after an I/O error (unplugged or reset) and tell its
+        subscribers it is gone. If it is still plugged in, the next scan
+        attaches it again.
+        """
+        for key, entry in self.devices.items():
+            if entry.device is device:
+                break
+        else:
+            return
+        del self.devices[key]
+        for port in [p for p, k in self._ports.items() if k == key]:
+            del self._ports[port]
+        self._notify(entry, 1)
+
+    def _ensure(self):
+        if not self._scanned:
+            self.scan()
+
+    def poll(self, bus=None, now=None):
+        """Rescan at most every HOTPLUG_MS."""
+        if now is None:
+            now = ticks_ms()
+        if not self._scanned or ticks_diff(now, self._last_scan) >= HOTPLUG_MS:
+            self.scan()
+
+    def due_in(self, now=None):
+        """Milliseconds until poll() would rescan."""
+        if not self._scanned:
+            return 0
+        if now is None:
+            now = ticks_ms()
+        return max(HOTPLUG_MS - ticks_diff(now, self._last_scan), 0)
+
+    def subscribe(self, cls, on_attach, on_detach=None):
+        """
+        Call on_attach(entry) for every present and future device of
+        class cls, and on_detach(entry) when one is unplugged.
+        """
+        self._ensure()
+        self._subs.setdefault(cls, []).append((on_attach, on_detach))
+        for entry in list(self.devices.values()):
+            if cls in entry.classes:
+                try:
+                    on_attach(entry)
+                except usb.core.USBError:
+                    self.drop(entry.device)     # retried by the next scan
+
+    def unsubscribe(self, cls, on_attach):
+        subs = self._subs.get(cls, [])
+        for callbacks in subs:
+            if callbacks[0] == on_attach:
+                subs.remove(callbacks)
+                return
+
+    def find(self, cls):
+        """First cached device offering cls, or None."""
+        self._ensure()
+        for entry in self.devices.values():
+            if cls in entry.classes:
+                return entry
+        return None
+
+    def find_all(self, cls):
+        self._ensure()
+        return [e for e in self.devices.values() if cls in e.classes]
+
+
+registry = Registry()
@@ -226,6 +226,12 @@ def exe(cmd):
             printf("Directory not found.")
     elif program == "cls":
         helpers.cls()
+    elif program == "chvt":
+        # chvt N switches to virtual console N (1-based, like Linux ttys)
+        try:
+            helpers.chvt(int(args[1]) - 1)
+        except (IndexError, ValueError):
+            printf(f"Usage: chvt 1-{helpers.CONSOLE_COUNT}")
     else:
         out = None
         try: